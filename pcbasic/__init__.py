@@ -5,6 +5,10 @@ PC-BASIC - GW-BASIC/BASICA/Cartridge BASIC compatible interpreter
 This file is released under the GNU GPL version 3 or later.
 """
 
+# time at which we started loading, for the start-up profile
+from time import time as _time
+START_TIME = _time()
+
 # compatibility pre-init: ensures package __path__ is absolute
 from . import compat
 
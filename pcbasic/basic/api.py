@@ -15,6 +15,7 @@ from .base import error
 from .devices import NameWrapper
 from . import implementation
 from . import state
+from . import profiler
 
 from ..data import read_codepage as codepage
 from ..data import read_fonts as font
@@ -133,6 +134,25 @@ class Session(object):
             raise ValueError('Sigil must be explicit')
         return self._impl.get_variable(name, as_type)
 
+    def set_array_buffer(self, name, data):
+        """Copy a numeric array from a buffer of values in memory representation."""
+        self.start()
+        if isinstance(name, text_type):
+            name = name.encode('ascii')
+        name = name.upper()
+        if name.split(b'(')[0][-1:] not in SIGILS:
+            raise ValueError('Sigil must be explicit')
+        self._impl.set_array_buffer(name, data)
+
+    def get_array_buffer(self, name):
+        """Get a copy of a numeric array's values in memory representation."""
+        self.start()
+        if isinstance(name, text_type):
+            name = name.encode('ascii')
+        if name.split(b'(')[0][-1:] not in SIGILS:
+            raise ValueError('Sigil must be explicit')
+        return self._impl.get_array_buffer(name)
+
     def convert(self, value, to_type):
         """Convert a Python value to another type, consistent with BASIC rules."""
         self.start()
@@ -184,11 +204,43 @@ class Session(object):
         self.start()
         return SessionInfo(self)
 
+    def stats(self):
+        """Get a dictionary of runtime counters."""
+        self.start()
+        return self._impl.get_stats()
+
+    def get_last_error(self):
+        """
+        Get error number and line number of the error that stopped the last command, or None.
+        Errors handled by ON ERROR are not included. The line number is None in direct mode.
+        """
+        self.start()
+        return self._impl.last_error
+
+    def set_statement_limit(self, count=None):
+        """Stop with StatementLimit after executing this many more statements; None for no limit."""
+        self.start()
+        interpreter = self._impl.interpreter
+        interpreter.statement_limit = None if count is None else interpreter.statements + count
+
     def set_hook(self, step_function):
         """Set function to be called on interpreter step."""
         self.start()
         self._impl.interpreter.step = step_function
 
+    def start_profiler(self):
+        """Start recording execution counts and times of program lines and statements."""
+        self.start()
+        self._impl.interpreter.profiler = profiler.Profiler(
+            self._impl.program, self._impl.queues, self._impl.sound, self._impl.memory.strings
+        )
+
+    def stop_profiler(self):
+        """Stop profiling and return the profiler, or None if not profiling."""
+        self.start()
+        recorded, self._impl.interpreter.profiler = self._impl.interpreter.profiler, None
+        return recorded
+
 
 class SessionInfo(object):
     """Retrieve information about current session."""
@@ -218,6 +270,10 @@ class SessionInfo(object):
         """Get a marked-up hex dump of the program."""
         return repr(self._impl.program)
 
+    def repr_stats(self):
+        """Get a representation of the runtime counters."""
+        return '\n'.join(_repr_stats(self._impl.get_stats()))
+
     def get_current_code(self, as_type=bytes):
         """Obtain statement being executed."""
         if self._impl.interpreter.run_mode:
@@ -239,3 +295,13 @@ class SessionInfo(object):
             )
         codestream.seek(bytepos)
         return self._session.convert(code_line, as_type)
+
+
+def _repr_stats(stats, prefix=u''):
+    """Generate lines of dotted counter names and values."""
+    for name, value in sorted(stats.items()):
+        if isinstance(value, dict):
+            for line in _repr_stats(value, prefix + name + u'.'):
+                yield line
+        else:
+            yield u'%s%s: %s' % (prefix, name, value)
@@ -66,9 +66,9 @@ class ByteMatrix(object):
             if isinstance(x, slice):
                 if isinstance(y, slice):
                     for row in self._rows[y]:
-                        row[x] = bytearray(value for _ in iterbytes(row[x]))
+                        row[x] = bytearray([value]) * len(row[x])
                 else:
-                    self._rows[y][x] = bytearray(value for _ in iterbytes(self._rows[y][x]))
+                    self._rows[y][x] = bytearray([value]) * len(self._rows[y][x])
             else:
                 if isinstance(y, slice):
                     for row in self._rows[y]:
@@ -100,6 +100,11 @@ class Reset(Exit):
     message = b'Reset'
 
 
+class StatementLimit(Exit):
+    """Exit emulator after executing the maximum number of statements."""
+    message = b'Statement limit reached'
+
+
 class Break(Interrupt):
     """Program interrupt."""
 
@@ -21,6 +21,7 @@ from .data import DEFAULT_CODEPAGE
 # ASCII but show as the subsitute glyph. Used e.g. for YEN SIGN in Shift-JIS
 # see http://www.siao2.com/2005/09/17/469941.aspx
 PRINTABLE_ASCII = tuple(int2byte(_c) for _c in range(0x20, 0x7F))
+_PRINTABLE_ASCII_SET = frozenset(PRINTABLE_ASCII)
 
 # on the terminal, these values are not shown as special graphic chars but as their normal effect
 # BEL, TAB, LF, HOME, CLS, CR, RIGHT, LEFT, UP, DOWN  (and not BACKSPACE)
@@ -85,42 +86,36 @@ class Codepage(object):
         }
         # protect box drawing sequences under dbcs?
         self.box_protect = box_protect
-        # lead and trail bytes
-        self.lead = set()
-        self.trail = set()
         # box-protection sets
         self._box_left = [set(), set()]
         self._box_right = [set(), set()]
-        # main dictionary
-        self._cp_to_unicode = {}
         # glyph subsitutes for printable ascii
         self._substitutes = {}
-        dbcs_num_chars = 0
-        for cp_point, unicode_cluster in iteritems(codepage_dict):
-            # normalise clusters so we can match later
-            unicode_cluster = unicodedata.normalize('NFC', unicode_cluster)
-            # do not redefine printable ASCII, but substitute glyphs
-            if (
-                    cp_point in PRINTABLE_ASCII and
-                    (len(unicode_cluster) > 1 or ord(unicode_cluster) != ord(cp_point))
-                ):
-                ascii_cp = unichr(ord(cp_point))
-                self._cp_to_unicode[cp_point] = ascii_cp
-                self._substitutes[cp_point] = unicode_cluster
-            else:
-                self._cp_to_unicode[cp_point] = unicode_cluster
-            # track lead and trail bytes
-            if len(cp_point) == 2:
-                self.lead.add(cp_point[0:1])
-                self.trail.add(cp_point[1:2])
-                dbcs_num_chars += 1
-            # track box drawing chars
-            else:
+        # main dictionary; normalise clusters so we can match later
+        normalize = unicodedata.normalize
+        self._cp_to_unicode = {
+            _cp_point: normalize('NFC', _cluster)
+            for _cp_point, _cluster in iteritems(codepage_dict)
+        }
+        # track box drawing chars
+        for cp_point, unicode_cluster in iteritems(self._cp_to_unicode):
+            if len(cp_point) == 1:
                 for i in (0, 1):
                     if unicode_cluster in _BOX_LEFT_UNICODE[i]:
-                        self._box_left[i].add(cp_point[0:1])
+                        self._box_left[i].add(cp_point)
                     if unicode_cluster in _BOX_RIGHT_UNICODE[i]:
-                        self._box_right[i].add(cp_point[0:1])
+                        self._box_right[i].add(cp_point)
+        # do not redefine printable ASCII, but substitute glyphs
+        for cp_point in _PRINTABLE_ASCII_SET.intersection(self._cp_to_unicode):
+            unicode_cluster = self._cp_to_unicode[cp_point]
+            if len(unicode_cluster) > 1 or ord(unicode_cluster) != ord(cp_point):
+                self._cp_to_unicode[cp_point] = unichr(ord(cp_point))
+                self._substitutes[cp_point] = unicode_cluster
+        # track lead and trail bytes
+        dbcs_points = [_cp_point for _cp_point in self._cp_to_unicode if len(_cp_point) == 2]
+        self.lead = set(_cp_point[0:1] for _cp_point in dbcs_points)
+        self.trail = set(_cp_point[1:2] for _cp_point in dbcs_points)
+        dbcs_num_chars = len(dbcs_points)
         # fill up any undefined 1-byte codepoints
         for c in range(256):
             if int2byte(c) not in self._cp_to_unicode:
@@ -135,6 +130,24 @@ class Codepage(object):
         self._unicode_clusters = list(reversed(sorted(self._unicode_clusters, key=len)))
         # is the current codepage a double-byte codepage?
         self.dbcs = dbcs_num_chars > 0
+        # decoding tables for single-byte codepages, by converter settings
+        self._decoding_tables = {}
+        # translation table for single-byte codepages without grapheme clusters
+        # unmapped characters in the latin-1 range are sent to a noncharacter so that
+        # encoding fails for them and they go through the general conversion
+        self._encoding_table = None
+        if not self.dbcs and not self._unicode_clusters:
+            self._encoding_table = {_c: u'\uffff' for _c in range(0x80, 0x100)}
+            self._encoding_table.update(
+                (ord(_uc), unichr(ord(_cp)))
+                for _uc, _cp in iteritems(self._unicode_to_cp)
+                if len(_uc) == 1 and _uc != u'\0'
+            )
+            self._encoding_table.update(
+                (ord(_uc), unichr(ord(_cp)))
+                for _uc, _cp in iteritems(self._inverse_substitutes)
+                if len(_uc) == 1
+            )
 
     def connects(self, c, d, bset):
         """Return True if c and d connect according to box-drawing set bset."""
@@ -183,6 +196,13 @@ class Codepage(object):
 
     def unicode_to_bytes(self, ucs, errors='ignore'):
         """Convert unicode string to codepage string."""
+        if self._encoding_table is not None and u'\0' not in ucs:
+            try:
+                return unicodedata.normalize('NFC', ucs).translate(
+                    self._encoding_table
+                ).encode('latin-1')
+            except UnicodeEncodeError:
+                pass
         return b''.join(self._from_unicode(uc, errors=errors) for uc in self._split_unicode(ucs))
 
     def codepoint_to_unicode(self, cp, replace=u'', use_substitutes=False):
@@ -194,6 +214,23 @@ class Codepage(object):
                 pass
         return self._cp_to_unicode.get(cp, replace)
 
+    def get_decoding_table(self, preserve, use_substitutes):
+        """Get a translation table from single-byte codepage ordinals to unicode."""
+        key = frozenset(preserve), use_substitutes
+        try:
+            return self._decoding_tables[key]
+        except KeyError:
+            pass
+        table = self._decoding_tables[key] = {
+            _c: (
+                int2byte(_c).decode('ascii', errors='ignore')
+                if int2byte(_c) in key[0]
+                else self.codepoint_to_unicode(int2byte(_c), use_substitutes=use_substitutes)
+            )
+            for _c in range(256)
+        }
+        return table
+
     def bytes_to_unicode(self, cps, preserve=(), box_protect=None, use_substitutes=False):
         """Convert codepage string to unicode string."""
         if box_protect is None:
@@ -318,13 +355,22 @@ class Converter(object):
         self._dbcs = self._cp.dbcs
         self._bset = -1
         self._last = b''
+        # single-byte codepages convert statelessly through a table
+        self._table = None
+        if not self._dbcs:
+            self._table = self._cp.get_decoding_table(self._preserve, use_substitutes)
 
     def to_unicode(self, s, flush=False):
         """Process codepage string, returning unicode string when ready."""
+        if self._table is not None:
+            return bytes(s).decode('latin-1').translate(self._table)
         return u''.join(self.to_unicode_list(s, flush))
 
     def to_unicode_list(self, s, flush=False):
         """Convert codepage to list of unicode with fullwidth marked by trailing u''."""
+        if self._table is not None:
+            table = self._table
+            return [table[_c] for _c in bytearray(s)]
         tuples = ((_seq,) if len(_seq) == 1 else (_seq, b'') for _seq in self._mark(s, flush))
         sequences = (_seq for _tup in tuples for _seq in _tup)
         return [
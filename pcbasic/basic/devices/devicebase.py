@@ -172,6 +172,9 @@ class RawFile(object):
         self._fhandle = fhandle
         self.filetype = filetype
         self.mode = mode.upper()
+        # bytes read from and written to the underlying stream
+        # the file manager replaces this with a list shared by all files on the same device
+        self.byte_counts = [0, 0]
 
     def __enter__(self):
         """Context guard."""
@@ -189,12 +192,15 @@ class RawFile(object):
     def read(self, num=-1):
         """Read num chars. If num==-1, read all available."""
         with safe_io():
-            return self._fhandle.read(num)
+            data = self._fhandle.read(num)
+        self.byte_counts[0] += len(data)
+        return data
 
     def write(self, s):
         """Write string to file."""
         with safe_io():
             self._fhandle.write(s)
+        self.byte_counts[1] += len(s)
 
     def flush(self):
         """Stub for compatibility with file-like objects."""
@@ -261,7 +267,9 @@ class TextFileBase(RawFile):
         to_read = num - len(self._readahead)
         if to_read > 0:
             with safe_io():
-                self._readahead.extend(iterchar(self._fhandle.read(to_read)))
+                data = self._fhandle.read(to_read)
+            self.byte_counts[0] += len(data)
+            self._readahead.extend(iterchar(data))
         return b''.join(self._readahead[:num])
 
     def read(self, num):
@@ -341,6 +349,7 @@ class TextFileBase(RawFile):
                     # col-1 is a byte that wraps
                     if self.col == 257:
                         self.col = 1
+        self.byte_counts[1] += len(s)
 
     def write_line(self, s=b''):
         """Write string and follow with device-standard line break."""
@@ -317,6 +317,7 @@ class RandomFile(RawFile):
         else:
             with safe_io():
                 contents = self._fhandle.read(self.reclen)
+            self.byte_counts[0] += len(contents)
         # take contents and pad with NULL to required size
         self._field_file.set_buffer(contents)
         self._recpos += 1
@@ -331,7 +332,9 @@ class RandomFile(RawFile):
                 self._fhandle.seek(0, 2)
                 numrecs = self._recpos - current_length
                 self._fhandle.write(b'\0' * numrecs * self.reclen)
+                self.byte_counts[1] += numrecs * self.reclen
             self._fhandle.write(bytes(self._field_file.get_buffer()))
+        self.byte_counts[1] += self.reclen
         self._recpos += 1
 
     def _set_record_pos(self, pos):
@@ -53,6 +53,8 @@ class Files(object):
         self.files = {}
         self.max_files = max_files
         self.max_reclen = max_reclen
+        # bytes read and written on each device
+        self.byte_counts = {}
         self._init_devices(
             values, queues, display, console, keyboard,
             device_params, current_device,
@@ -95,6 +97,7 @@ class Files(object):
             number, dev_param, filetype, mode, access, lock,
             reclen, seg, offset, length, field
         )
+        new_file.byte_counts = self.byte_counts.setdefault(self._get_device_name(device), [0, 0])
         logging.debug(
             'Opened file %r as #%d (type %s, mode %s)', dev_param, number, filetype, mode
         )
@@ -154,6 +157,9 @@ class Files(object):
         self.scrn_file = self._devices[b'SCRN:'].device_file
         self.kybd_file = self._devices[b'KYBD:'].device_file
         self.lpt1_file = self._devices[b'LPT1:'].device_file
+        if self.lpt1_file:
+            # LPRINT writes to the device file directly
+            self.lpt1_file.byte_counts = self.byte_counts.setdefault(b'LPT1:', [0, 0])
         # disks
         self._init_disk_devices(device_params, current_device, codepage, text_mode, soft_linefeed)
 
@@ -236,6 +242,13 @@ class Files(object):
         """Get a device by name (including :) or KeyError if not there."""
         return self._devices[name]
 
+    def _get_device_name(self, device):
+        """Get the name of a device object."""
+        for name, dev in iteritems(self._devices):
+            if dev is device:
+                return name
+        return b'NUL:'
+
     def _get_device_param(self, file_spec, mode):
         """Get a device object and parameters from a file specification."""
         name = bytes(file_spec)
@@ -126,11 +126,13 @@ class LPTFile(TextFileBase):
                 if can_break and self.width != 255:
                     if self._settings.col > self.width:
                         self._fhandle.write(b'\r\n')
+                        self.byte_counts[1] += 2
                         # GW-BASIC quirk: on LPT1 files the LPOS goes to width+1, then wraps to 2
                         if not self._bug:
                             self._settings.col = 1
                         elif self._settings.col > self.width + 1:
                             self._settings.col = 2
+        self.byte_counts[1] += len(s)
         self.col = self._settings.col
 
     def write_line(self, s=b''):
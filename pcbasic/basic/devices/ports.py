@@ -341,6 +341,7 @@ class COMFile(TextFileBase, RealTimeInputMixin):
                 self._current, self._previous = self._fhandle.read(1), self._current
             if self._current:
                 s.append(self._current)
+                self.byte_counts[0] += 1
         logging.debug('Reading from serial port %s: %r', self._fhandle.port, b''.join(s))
         return b''.join(s)
 
@@ -376,6 +377,7 @@ class COMFile(TextFileBase, RealTimeInputMixin):
         with safe_io():
             logging.debug('Writing to serial port %s: %r', self._fhandle.port, s)
             self._fhandle.write(s)
+        self.byte_counts[1] += len(s)
 
     def get(self, num):
         """Read num bytes - GET on COM port."""
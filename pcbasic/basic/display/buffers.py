@@ -9,7 +9,7 @@ This file is released under the GNU GPL version 3 or later.
 import logging
 from contextlib import contextmanager
 
-from ...compat import PY2, zip, int2byte, iterchar, text_type
+from ...compat import PY2, zip, int2byte, iterchar, text_type, iteritems
 from ...compat import iter_chunks
 from ..base import signals
 from ..base.bytematrix import ByteMatrix
@@ -53,10 +53,12 @@ class _PixelAccess(object):
 
     def __getitem__(self, index):
         """Retrieve a copy of a pixel range."""
+        self._video_buffer.render()
         return self._pixels[index]
 
     def __setitem__(self, index, data):
         """Set a pixel range, clear affected text buffers and submit to interface."""
+        self._video_buffer.render()
         self._pixels[index] = data
         # make sure the indices are slices so that __getattr__ returns a matrix
         yslice, xslice = index
@@ -72,7 +74,7 @@ class VideoBuffer(object):
 
     def __init__(
             self, queues, pixel_height, pixel_width, height, width,
-            colourmap, attr, font, codepage, do_fullwidth
+            colourmap, attr, font, codepage, do_fullwidth, is_text_mode=False
         ):
         """Initialise the screen buffer to given dimensions."""
         self._rows = [_TextRow(attr, width) for _ in range(height)]
@@ -95,6 +97,12 @@ class VideoBuffer(object):
         self._dirty_right = {}
         self._locked = False
         self._visible = False
+        # without interface, text is drawn to the pixel buffer only when pixels are needed
+        # in graphics mode, keep the columns not yet drawn, by row
+        self._undrawn = {}
+        # in text mode, pixels follow from the text, so just redraw the page
+        self._is_text_mode = is_text_mode
+        self._redraw = False
 
     def set_visible(self, visible):
         """Set the vpage flag."""
@@ -219,6 +227,9 @@ class VideoBuffer(object):
 
     def copy_from(self, src):
         """Copy source into this page."""
+        src.render()
+        self._undrawn = {}
+        self._redraw = False
         for dst_row, src_row in zip(self._rows, src._rows):
             assert len(dst_row.chars) == len(src_row.chars)
             assert len(dst_row.attrs) == len(src_row.attrs)
@@ -237,6 +248,7 @@ class VideoBuffer(object):
 
     def _update_pixels(self, top, left, bottom, right):
         """Clear the text under the rect and submit to interface."""
+        self.render()
         row0, col0, row1, col1 = self.pixel_to_text_area(left, top, right, bottom)
         # clear text area
         # we can't see or query the attribute in graphics mode - might as well set to zero
@@ -335,11 +347,15 @@ class VideoBuffer(object):
 
     def resubmit(self):
         """Completely resubmit the text and graphics screen to the interface."""
+        if self._queues.headless:
+            # nothing to submit to; leave drawing until the pixels are needed
+            return
+        self.render()
         self._submit(1, 1, self._height, self._width)
 
     def _submit(self, top, left, bottom, right):
         """Submit a rectangular screen section to interface (text coordinates)."""
-        if self._visible:
+        if self._visible and not self._queues.headless:
             text = [_row[left-1:right] for _row in self._dbcs_text[top-1:bottom]]
             attrs = [_row.attrs[left-1:right] for _row in self._rows[top-1:bottom]]
             x0, y0 = self.text_to_pixel_pos(top, left)
@@ -347,6 +363,7 @@ class VideoBuffer(object):
             self._queues.video.put(signals.Event(
                 signals.VIDEO_UPDATE, (top, left, text, attrs, y0, x0, self._pixels[y0:y1, x0:x1])
             ))
+            self._queues.video_signals += 1
 
     ###########################################################################
     # text rendering - dirty rectangles
@@ -371,6 +388,7 @@ class VideoBuffer(object):
         if row in self._dirty_left:
             self._dirty_left[row] = min(start, self._dirty_left[row])
             self._dirty_right[row] = max(stop, self._dirty_right[row])
+            self._queues.video_coalesced += 1
         else:
             self._dirty_left[row] = start
             self._dirty_right[row] = stop
@@ -381,11 +399,43 @@ class VideoBuffer(object):
         """Update dbcs, write all dirty text rectangles to pixels and submit."""
         for row in sorted(self._dirty_left):
             start, stop = self._refresh_dbcs(row, self._dirty_left[row], self._dirty_right[row])
-            self._draw_text(row, start, row, stop)
-            self._submit(row, start, row, stop)
+            if self._skip_pixels():
+                self._queues.video_coalesced += 1
+            elif self._queues.headless:
+                # nothing to show, so draw the text only when the pixels are needed
+                self._undrawn.setdefault(row, set()).update(range(start, stop+1))
+                self._queues.video_coalesced += 1
+            else:
+                self._draw_text(row, start, row, stop)
+                self._submit(row, start, row, stop)
         self._dirty_left = {}
         self._dirty_right = {}
 
+    def _skip_pixels(self):
+        """In text mode without interface, leave the pixels to be redrawn from the text."""
+        if self._is_text_mode and self._queues.headless:
+            self._redraw = True
+        return self._redraw
+
+    def render(self):
+        """Draw any text not yet drawn to the pixel buffer."""
+        if self._redraw:
+            self._redraw = False
+            self._undrawn = {}
+            self._draw_text(1, 1, self._height, self._width)
+            return
+        if not self._undrawn:
+            return
+        undrawn, self._undrawn = self._undrawn, {}
+        for row, cols in sorted(iteritems(undrawn)):
+            # draw each run of consecutive columns
+            cols = sorted(cols)
+            start = cols[0]
+            for last, col in zip(cols, cols[1:] + [None]):
+                if col != last + 1:
+                    self._draw_text(row, start, row, last)
+                    start = col
+
     ###########################################################################
     # text rendering
 
@@ -418,18 +468,23 @@ class VideoBuffer(object):
 
     def clear_rows(self, start, stop, attr):
         """Clear text and graphics on given (inclusive) text row range."""
+        skip_pixels = self._skip_pixels()
+        if not skip_pixels:
+            self.render()
         self._clear_text_area(
             start, 1, stop, self._width, attr, adjust_end=True, clear_wrap=True
         )
         # clear pixels
-        x0, y0, x1, y1 = self.text_to_pixel_area(start, 1, stop, self._width)
         _, back, _, _ = self._colourmap.split_attr(attr)
-        self._pixels[y0:y1+1, x0:x1+1] = back
+        if not skip_pixels:
+            x0, y0, x1, y1 = self.text_to_pixel_area(start, 1, stop, self._width)
+            self._pixels[y0:y1+1, x0:x1+1] = back
         # submit dirty rects before clear
         self.force_submit()
         # this should only be called on the active page
-        if self._visible:
+        if self._visible and not self._queues.headless:
             self._queues.video.put(signals.Event(signals.VIDEO_CLEAR_ROWS, (back, start, stop)))
+            self._queues.video_signals += 1
 
     def clear_row_from(self, row, col, attr):
         """Clear from given position to end of row."""
@@ -473,11 +528,15 @@ class VideoBuffer(object):
         """Scroll up by one line, between from_row and to_row, filling empty row with attr."""
         # submit dirty rects before scroll
         self.force_submit()
+        skip_pixels = self._skip_pixels()
+        if not skip_pixels:
+            self.render()
         _, back, _, _ = self._colourmap.split_attr(attr)
-        if self._visible:
+        if self._visible and not self._queues.headless:
             self._queues.video.put(signals.Event(
                 signals.VIDEO_SCROLL, (-1, from_row, to_row, back)
             ))
+            self._queues.video_signals += 1
         # update text buffer
         new_row = _TextRow(attr, self._width)
         self._rows.insert(to_row, new_row)
@@ -490,6 +549,8 @@ class VideoBuffer(object):
         self._dbcs_text[from_row-1:to_row-1] = self._dbcs_text[from_row:to_row]
         self._dbcs_text[to_row-1] = [u' '] * self._width
         # update pixel buffer
+        if skip_pixels:
+            return
         sx0, sy0, sx1, sy1 = self.text_to_pixel_area(
             from_row+1, 1, to_row, self._width
         )
@@ -500,11 +561,15 @@ class VideoBuffer(object):
         """Scroll down by one line, between from_row and to_row, filling empty row with attr."""
         # submit dirty rects before scroll
         self.force_submit()
+        skip_pixels = self._skip_pixels()
+        if not skip_pixels:
+            self.render()
         _, back, _, _ = self._colourmap.split_attr(attr)
-        if self._visible:
+        if self._visible and not self._queues.headless:
             self._queues.video.put(signals.Event(
                 signals.VIDEO_SCROLL, (1, from_row, to_row, back)
             ))
+            self._queues.video_signals += 1
         # update text buffer
         new_row = _TextRow(attr, self._width)
         # insert at row # from_row
@@ -519,6 +584,8 @@ class VideoBuffer(object):
         self._dbcs_text[from_row:to_row] = self._dbcs_text[from_row-1:to_row-1]
         self._dbcs_text[from_row-1] = [u' '] * self._width
         # update pixel buffer
+        if skip_pixels:
+            return
         sx0, sy0, sx1, sy1 = self.text_to_pixel_area(
             from_row, 1, to_row-1, self._width
         )
@@ -220,6 +220,7 @@ class Display(object):
                 self.mode.height, self.mode.width,
                 self.colourmap, self.attr, font, self._codepage,
                 do_fullwidth=(self.mode.is_text_mode and self.mode.font_height >= 14),
+                is_text_mode=self.mode.is_text_mode,
             )
             for _pagenum in range(self.mode.num_pages)
         ]
@@ -63,13 +63,12 @@ class Font(object):
         return copy
 
     def init_mode(self, width, height):
-        """Preload SBCS glyphs at mode switch."""
+        """Set glyph size at mode switch."""
         if self._width != width or self._height != height:
             self._width = width
             self._height = height
-            # build the basic 256 codepage characters
-            for _c in range(256):
-                self._build_glyph(self._byte_to_char(_c), fullwidth=False)
+            # glyphs are rebuilt at the new size when first used
+            self._glyphs = {}
         return self
 
     def get_byte(self, byte, offset):
@@ -85,8 +85,22 @@ class EventQueues(object):
     max_video_qsize = 200
     #max_audio_qsize = 20
 
-    def __init__(self, ctrl_c_is_break, inputs=None, video=None, audio=None):
+    def __init__(self, ctrl_c_is_break, inputs=None, video=None, audio=None, poll_interval=0):
         """Initialise; default is NullQueues."""
+        # minimum time between polls while running without interface or event traps, in seconds
+        self._poll_interval = poll_interval
+        self._next_poll = 0
+        # counters for the polling rate achieved
+        self.polls = 0
+        self.skipped_polls = 0
+        # time spent in wait()
+        self.wait_time = 0.
+        # number of input signals handled
+        self.input_events = 0
+        # number of screen updates sent to the video queue, and merged or deferred instead
+        self.video_signals = 0
+        self.video_coalesced = 0
+        self._start_time = time.time()
         # input signal handlers
         self._handlers = []
         # basic event handlers
@@ -104,6 +118,9 @@ class EventQueues(object):
         self.inputs = inputs or NullQueue()
         self.video = video or NullQueue()
         self.audio = audio or NullQueue()
+        # without an interface, nothing reads the video queue
+        # with one, it needs the queues serviced on every statement
+        self.headless = video is None
 
     def __getstate__(self):
         """Don't pickle queues."""
@@ -126,13 +143,31 @@ class EventQueues(object):
         """Set the handlers for BASIC events."""
         self._basic_handlers = tuple(event_check_input)
 
+    def get_poll_rate(self):
+        """Number of polls per second since start."""
+        return self.polls / max(self.tick, time.time() - self._start_time)
+
     def wait(self):
         """Wait and check events."""
+        start = time.time()
         time.sleep(self.tick)
-        self.check_events()
+        self.poll()
+        self.wait_time += time.time() - start
 
     def check_events(self):
+        """Check events between statements, at most once per poll interval if nothing is waiting."""
+        # event traps and interfaces need immediate checks; pausing needs no budget
+        if not (self._basic_handlers or not self.headless or self._pause):
+            now = time.time()
+            if now < self._next_poll:
+                self.skipped_polls += 1
+                return
+            self._next_poll = now + self._poll_interval
+        self.poll()
+
+    def poll(self):
         """Main event cycle."""
+        self.polls += 1
         # sleep(0) is needed for responsiveness, e.g. event trapping in programs with tight loops
         # i.e. 100 goto 100 with event traps active) - needed to allow the input queue to fill
         # this also allows the screen to update between statements
@@ -176,6 +211,7 @@ class EventQueues(object):
                         e.check_input(signals.Event(None))
                     break
             self.inputs.task_done()
+            self.input_events += 1
             # effect replacements
             self._replace_inputs(signal)
             # handle input events
@@ -13,7 +13,7 @@ import logging
 from functools import partial
 from contextlib import contextmanager
 
-from ..compat import queue, text_type
+from ..compat import queue, text_type, iteritems
 
 from .data import NAME, VERSION, COPYRIGHT
 from .base import error
@@ -39,6 +39,7 @@ from . import codepage as cp
 from . import values
 from . import parser
 from . import extensions
+from . import profiler
 
 
 GREETING = (
@@ -62,9 +63,11 @@ class Implementation(object):
             peek_values=None, allow_code_poke=False, rebuild_offsets=True,
             max_memory=65534, reserved_memory=3429, video_memory=262144,
             serial_buffer_size=128, max_reclen=128, max_files=3,
-            extension=()
+            extension=(), code_cache=True, poll_interval=10
         ):
         """Initialise the interpreter session."""
+        # keep track of the time taken to set up each subsystem
+        timer = profiler.StartupTimer()
         ######################################################################
         # session-level members
         ######################################################################
@@ -76,6 +79,9 @@ class Implementation(object):
         self._auto_increment = 10
         # syntax error prompt and EDIT
         self._edit_prompt = False
+        # error number and line number of the error, not handled by ON ERROR,
+        # that stopped the last command
+        self.last_error = None
         # terminal program for TERM command
         self._term_program = term
         ######################################################################
@@ -103,20 +109,26 @@ class Implementation(object):
         )
         # register all data segment users
         self.memory.set_buffers(self.program)
+        timer.mark(u'data segment')
         ######################################################################
         # console
         ######################################################################
         # prepare codepage
         self.codepage = cp.Codepage(codepage, box_protect)
+        timer.mark(u'codepage')
         # set up input event handler
         # no interface yet; use dummy queues
-        self.queues = eventcycle.EventQueues(ctrl_c_is_break, inputs=queue.Queue())
+        self.queues = eventcycle.EventQueues(
+            ctrl_c_is_break, inputs=queue.Queue(), poll_interval=poll_interval/1000.
+        )
         # prepare I/O streams
         self.io_streams = iostreams.IOStreams(self.queues, self.codepage)
         self.io_streams.add_pipes(input=input_streams)
         self.io_streams.add_pipes(output=output_streams)
+        timer.mark(u'streams')
         # initialise sound queue
         self.sound = sound.Sound(self.queues, self.values, self.memory, syntax)
+        timer.mark(u'sound')
         # initialise video
         self.display = display.Display(
             self.queues, self.values, self.queues,
@@ -125,6 +137,7 @@ class Implementation(object):
         )
         self.text_screen = self.display.text_screen
         self.graphics = self.display.graphics
+        timer.mark(u'display')
         # prepare input devices (keyboard, pen, joystick, clipboard-copier)
         # EventHandler needed for wait() only
         self.keyboard = inputs.Keyboard(
@@ -144,6 +157,7 @@ class Implementation(object):
         )
         # initilise floating-point error message stream
         self.values.set_handler(values.FloatErrorHandler(self.console))
+        timer.mark(u'console')
         ######################################################################
         # devices
         ######################################################################
@@ -158,6 +172,7 @@ class Implementation(object):
         )
         # enable printer echo from console
         self.console.set_lpt1_file(self.files.lpt1_file)
+        timer.mark(u'devices')
         ######################################################################
         # other components
         ######################################################################
@@ -172,6 +187,7 @@ class Implementation(object):
         self.randomiser = values.Randomiser(self.values)
         # initialise system clock
         self.clock = clock.Clock(self.values)
+        timer.mark(u'shell and clock')
         ######################################################################
         # register input event handlers
         ######################################################################
@@ -187,20 +203,24 @@ class Implementation(object):
         self.basic_events = basicevents.BasicEvents(
             self.sound, self.clock, self.files, self.program, num_fn_keys, tandy_fn_keys
         )
+        timer.mark(u'events')
         ######################################################################
         # extensions
         ######################################################################
         self.extensions = extensions.Extensions(extension, self.values, self.codepage)
+        timer.mark(u'extensions')
         ######################################################################
         # interpreter
         ######################################################################
         # initialise the parser
-        self.parser = parser.Parser(self.values, self.memory, syntax)
+        self.parser = parser.Parser(self.values, self.memory, syntax, code_cache)
         # initialise the interpreter
         self.interpreter = interpreter.Interpreter(
             self.queues, self.console, self.display.cursor, self.files, self.sound,
-            self.values, self.memory, self.program, self.parser, self.basic_events
+            self.values, self.memory, self.program, self.parser, self.basic_events,
+            code_cache
         )
+        timer.mark(u'interpreter')
         ######################################################################
         # callbacks
         ######################################################################
@@ -216,6 +236,8 @@ class Implementation(object):
         )
         # build function table (depends on Memory having been initialised)
         self.parser.init_callbacks(self)
+        timer.mark(u'machine')
+        self.startup_times = timer.times
 
     def __getstate__(self):
         """Pickle the session."""
@@ -310,6 +332,50 @@ class Implementation(object):
             convert = self.get_converter(type(value), as_type)
             return convert(value)
 
+    def set_array_buffer(self, name, data):
+        """Copy a numeric array from a buffer of values in memory representation."""
+        self.arrays.from_buffer(name.upper().split(b'(', 1)[0], data)
+
+    def get_array_buffer(self, name):
+        """Get a copy of a numeric array's values in memory representation."""
+        return self.arrays.to_buffer(name.upper().split(b'(', 1)[0])
+
+    def get_stats(self):
+        """Get runtime counters."""
+        return {
+            u'statements': self.interpreter.statements,
+            u'expressions': self.parser.expression_parser.evaluations,
+            u'string_gc': {
+                u'runs': self.strings.gc_runs,
+                u'time': self.strings.gc_time,
+                u'moved': self.strings.gc_moved,
+            },
+            u'allocations': {
+                u'scalars': self.scalars.allocations,
+                u'arrays': self.arrays.allocations,
+            },
+            u'video': {
+                u'signals': self.queues.video_signals,
+                u'coalesced': self.queues.video_coalesced,
+            },
+            u'input_events': self.queues.input_events,
+            u'polls': {
+                u'polls': self.queues.polls,
+                u'skipped': self.queues.skipped_polls,
+                u'rate': self.queues.get_poll_rate(),
+            },
+            u'devices': {
+                _name.decode('ascii'): {u'read': _counts[0], u'written': _counts[1]}
+                for _name, _counts in iteritems(self.files.byte_counts)
+            },
+            u'wait_time': {
+                # sound waits are included in event queue waits
+                u'events': self.queues.wait_time,
+                u'sound': self.sound.wait_time,
+            },
+            u'startup': dict(self.startup_times),
+        }
+
     def interact(self):
         """Interactive interpreter session."""
         while True:
@@ -361,6 +427,7 @@ class Implementation(object):
         elif c != b'':
             self.interpreter.run_mode = False
             # it is a command, go and execute
+            self.last_error = None
             self.interpreter.set_parse_mode(True)
             return False
 
@@ -368,7 +435,7 @@ class Implementation(object):
         """Generate an AUTO line number and wait for input."""
         try:
             numstr = b'%d' % (self._auto_linenum,)
-            if self._auto_linenum in self.program.line_numbers:
+            if self.program.has_line(self._auto_linenum):
                 prompt = numstr + b'*'
             else:
                 prompt = numstr + b' '
@@ -390,6 +457,7 @@ class Implementation(object):
                 self._auto_linenum = scanline + self._auto_increment
             elif c != b'':
                 # it is a command, go and execute
+                self.last_error = None
                 self.interpreter.set_parse_mode(True)
         except error.Break:
             # ctrl+break, ctrl-c both stop background sound
@@ -418,6 +486,9 @@ class Implementation(object):
                 if e.trapped_error_num == error.STX:
                     self._syntax_error_edit_prompt(e.trapped_error_pos)
         except error.BASICError as e:
+            line = self.program.get_line_number(e.pos)
+            # line number -1 means direct mode
+            self.last_error = e.err, (line if line != -1 else None)
             self._handle_error(e)
         except error.Exit:
             raise
@@ -20,7 +20,7 @@ class Interpreter(object):
 
     def __init__(
             self, queues, console, cursor, files, sound,
-            values, memory, program, parser, basic_events
+            values, memory, program, parser, basic_events, code_cache=True
         ):
         """Initialise interpreter."""
         self._queues = queues
@@ -40,6 +40,13 @@ class Interpreter(object):
         self.current_statement = 0
         # statement syntax parser
         self.parser = parser
+        # decoded program statements by code position, or None to decode on every execution
+        self._statement_cache = {} if code_cache else None
+        # outcome of the search for the matching NEXT or WEND, by position after FOR or WHILE
+        self._loop_index = {} if code_cache else None
+        # parsed DATA items, by data pointer and whether a string is read
+        self._data_index = {} if code_cache else None
+        self._cache_version = None
         # line number tracing
         self.tron = False
         # pointer position: False for direct line, True for program
@@ -56,12 +63,22 @@ class Interpreter(object):
         self.set_parse_mode(False)
         # additional operations on program step (debugging)
         self.step = lambda token: None
+        # execution profiler, None if not profiling
+        self.profiler = None
+        # number of statements executed
+        self.statements = 0
+        # value of the statement counter at which to stop, or None
+        self.statement_limit = None
 
     def __getstate__(self):
         """Pickle."""
         pickle_dict = self.__dict__.copy()
         # functions can't be pickled
         pickle_dict['step'] = None
+        pickle_dict['profiler'] = None
+        if self._statement_cache is not None:
+            pickle_dict['_statement_cache'] = {}
+            pickle_dict['_data_index'] = {}
         return pickle_dict
 
     def __setstate__(self, pickle_dict):
@@ -98,32 +115,76 @@ class Interpreter(object):
                 self.handle_basic_events()
                 ins = self.get_codestream()
                 self.current_statement = ins.tell()
-                c = ins.skip_blank_read()
-                # parse line number or : at start of statement
-                if c in tk.END_LINE:
-                    # line number marker, new statement
-                    token = ins.read(4)
-                    # end of program or truncated file
-                    if token[:2] == b'\0\0' or len(token) < 4:
-                        if c == b'\0' and self.error_resume:
-                            # unfinished error handler: no RESUME (don't trap this)
-                            self.error_handle_mode = True
-                            # get line number right
-                            raise error.BASICError(error.NO_RESUME, ins.tell()-len(token)-2)
-                        # stream has ended
-                        self.set_pointer(False)
-                        return
-                    if self.tron:
-                        linenum = struct.unpack_from('<H', token, 2)
-                        self._console.write(b'[%i]' % linenum)
-                    self.step(token)
-                elif c not in (b':', tk.THEN, tk.ELSE, tk.GOTO):
-                    # new statement or branch of an IF statement allowed, nothing else
-                    raise error.BASICError(error.STX)
-                self.parser.parse_statement(ins)
+                if self.profiler is not None:
+                    self.profiler.mark(self.current_statement if self.run_mode else None)
+                cache = self._get_code_cache(self._statement_cache, ins)
+                decoded = cache.get(self.current_statement) if cache is not None else None
+                if decoded:
+                    token, callback, parse_args, end = decoded
+                    if token:
+                        self._trace_line(token)
+                    ins.seek(end)
+                else:
+                    token = None
+                    c = ins.skip_blank_read()
+                    # parse line number or : at start of statement
+                    if c in tk.END_LINE:
+                        # line number marker, new statement
+                        token = ins.read(4)
+                        # end of program or truncated file
+                        if token[:2] == b'\0\0' or len(token) < 4:
+                            if c == b'\0' and self.error_resume:
+                                # unfinished error handler: no RESUME (don't trap this)
+                                self.error_handle_mode = True
+                                # get line number right
+                                raise error.BASICError(error.NO_RESUME, ins.tell()-len(token)-2)
+                            # stream has ended
+                            self.set_pointer(False)
+                            return
+                        self._trace_line(token)
+                    elif c not in (b':', tk.THEN, tk.ELSE, tk.GOTO):
+                        # new statement or branch of an IF statement allowed, nothing else
+                        raise error.BASICError(error.STX)
+                    decoded = self.parser.decode_statement(ins)
+                    if not decoded:
+                        continue
+                    callback, parse_args = decoded
+                    if cache is not None:
+                        # store before executing, the statement may change the program
+                        cache[self.current_statement] = token, callback, parse_args, ins.tell()
+                if self.statement_limit is not None and self.statements >= self.statement_limit:
+                    raise error.StatementLimit()
+                run_mode = self.run_mode
+                try:
+                    callback(parse_args(ins))
+                finally:
+                    # don't count the direct-mode statement that starts a program, e.g. RUN
+                    if run_mode or not self.run_mode:
+                        self.statements += 1
             except error.BASICError as e:
                 self.trap_error(e)
 
+    def _trace_line(self, token):
+        """Show line number if tracing and perform debugging step at start of a program line."""
+        if self.tron:
+            linenum = struct.unpack_from('<H', token, 2)
+            self._console.write(b'[%i]' % linenum)
+        if self.profiler is not None:
+            self.profiler.count_line(token)
+        self.step(token)
+
+    def _get_code_cache(self, cache, ins):
+        """Get a cache by position in the program code, or None if not caching."""
+        if cache is None or ins is not self._program_code:
+            return None
+        if self._cache_version != self._program.code_version:
+            # program has been changed, positions and contents are no longer valid
+            self._statement_cache.clear()
+            self._loop_index.clear()
+            self._data_index.clear()
+            self._cache_version = self._program.code_version
+        return cache
+
     def loop(self):
         """Run commands until control returns to user."""
         if not self.parse_mode:
@@ -134,6 +195,17 @@ class Interpreter(object):
         except error.Break as e:
             self._sound.stop_all_sound()
             self._handle_break(e)
+        except error.StatementLimit:
+            # leave the session in direct mode, ready for the next command
+            self._return_control()
+            raise
+        self._return_control()
+
+    def _return_control(self):
+        """Stop parsing and return to direct mode."""
+        if self.profiler is not None:
+            # stop timing the last statement
+            self.profiler.mark(None)
         # move pointer to the start of direct line (for both on and off!)
         self.set_pointer(False, 0)
         # return control to user
@@ -141,6 +213,9 @@ class Interpreter(object):
 
     def set_parse_mode(self, on):
         """Enter or exit parse mode."""
+        if on:
+            # statements read the program code directly, so write any stored lines first
+            self._program.materialise()
         self.parse_mode = on
         self._cursor.set_direct(not on)
 
@@ -418,26 +493,40 @@ class Interpreter(object):
     def _find_next(self, ins, varname):
         """Helper function for FOR: find matching NEXT."""
         endforpos = ins.tell()
-        ins.skip_block(tk.FOR, tk.NEXT, allow_comma=True)
-        if ins.skip_blank() not in (tk.NEXT, b','):
+        index = self._get_code_cache(self._loop_index, ins)
+        if index is not None and endforpos in index:
+            found, comma, name, nextpos = index[endforpos]
+        else:
+            found, comma, name, nextpos = self._scan_next(ins)
+            if index is not None:
+                index[endforpos] = found, comma, name, nextpos
+        if not found:
             # FOR without NEXT marked with FOR line number
             ins.seek(endforpos)
             raise error.BASICError(error.FOR_WITHOUT_NEXT)
-        comma = (ins.read(1) == b',')
         # check var name for NEXT
         # no-var only allowed in standalone NEXT
-        if ins.skip_blank() not in tk.END_STATEMENT:
-            varname2 = self._memory.complete_name(self.parser.parse_name(ins))
-        else:
-            varname2 = None
-        # get position and line number just after the matching variable in NEXT
-        nextpos = ins.tell()
+        varname2 = None if name is None else self._memory.complete_name(name)
         if (comma or varname2) and varname2 != varname:
             # NEXT without FOR marked with NEXT line number, while we're only at FOR
+            ins.seek(nextpos)
             raise error.BASICError(error.NEXT_WITHOUT_FOR)
         ins.seek(endforpos)
         return endforpos, nextpos
 
+    def _scan_next(self, ins):
+        """Scan for the NEXT matching a FOR; return found, comma, variable name and position."""
+        ins.skip_block(tk.FOR, tk.NEXT, allow_comma=True)
+        if ins.skip_blank() not in (tk.NEXT, b','):
+            return False, False, None, None
+        comma = (ins.read(1) == b',')
+        if ins.skip_blank() not in tk.END_STATEMENT:
+            name = self.parser.parse_name(ins)
+        else:
+            name = None
+        # get position and line number just after the matching variable in NEXT
+        return True, comma, name, ins.tell()
+
     def next_(self, args):
         """Iterate a loop (NEXT)."""
         for varname in args:
@@ -488,14 +577,22 @@ class Interpreter(object):
         """Helper function for WHILE: find matching WEND."""
         # just after WHILE token
         whilepos = ins.tell()
-        ins.skip_block(tk.WHILE, tk.WEND)
-        if ins.read(1) != tk.WEND:
+        index = self._get_code_cache(self._loop_index, ins)
+        if index is not None and whilepos in index:
+            wendpos = index[whilepos]
+        else:
+            ins.skip_block(tk.WHILE, tk.WEND)
+            if ins.read(1) != tk.WEND:
+                wendpos = None
+            else:
+                ins.skip_to(tk.END_STATEMENT)
+                wendpos = ins.tell()
+            if index is not None:
+                index[whilepos] = wendpos
+        ins.seek(whilepos)
+        if wendpos is None:
             # WHILE without WEND
-            ins.seek(whilepos)
             raise error.BASICError(error.WHILE_WITHOUT_WEND)
-        ins.skip_to(tk.END_STATEMENT)
-        wendpos = ins.tell()
-        ins.seek(whilepos)
         return whilepos, wendpos
 
     def _check_while_condition(self, ins, whilepos):
@@ -544,45 +641,31 @@ class Interpreter(object):
 
     def read_(self, args):
         """READ: read values from DATA statement."""
-        data_error = False
+        index = self._get_code_cache(self._data_index, self._program_code)
         for name, indices in args:
             name = self._memory.complete_name(name)
+            is_string = name[-1:] == values.STR
             current = self._program_code.tell()
-            self._program_code.seek(self.data_pos)
-            if self._program_code.peek() in tk.END_STATEMENT:
-                # initialise - find first DATA
-                self._program_code.skip_to_token(tk.DATA,)
-            if self._program_code.read(1) not in (tk.DATA, b','):
+            key = self.data_pos, is_string
+            if index is not None and key in index:
+                item = index[key]
+            else:
+                # may raise errors at the DATA location
+                item = self._read_data_item(is_string)
+                if index is not None:
+                    index[key] = item
+            if item is None:
                 self._program_code.seek(current)
                 raise error.BASICError(error.OUT_OF_DATA)
-            self._program_code.skip_blank()
-            if name[-1:] == values.STR:
-                # for unquoted strings, payload starts at the first non-empty character
-                address = self._program_code.tell_address()
-                word = self._program_code.read_to((b',', b'"',) + tk.END_STATEMENT)
-                if self._program_code.peek() == b'"':
-                    if word == b'':
-                        # nothing before the quotes, so this is a quoted string literal
-                        # string payload starts after quote
-                        address = self._program_code.tell_address() + 1
-                        word = self._program_code.read_string().strip(b'"')
-                    else:
-                        # complete unquoted string literal
-                        word += self._program_code.read_string()
-                    if (self._program_code.skip_blank() not in (tk.END_STATEMENT + (b',',))):
-                        raise error.BASICError(error.STX)
-                else:
-                    word = word.strip(self._program_code.blanks)
+            word, address, item_pos, data_error, data_pos = item
+            # convert at the DATA location, so that any errors are reported there
+            self._program_code.seek(item_pos)
+            if is_string:
                 value = self._values.from_str_at(word, address)
             else:
-                word = self._program_code.read_number()
                 value = self._values.from_repr(word, allow_nonnum=False)
-                # anything after the number is a syntax error, but assignment has taken place)
-                if (self._program_code.skip_blank() not in (tk.END_STATEMENT + (b',',))):
-                    data_error = True
             # restore to current program location
             # to ensure any other errors in set_variable get the correct line number
-            data_pos = self._program_code.tell()
             self._program_code.seek(current)
             self._memory.set_variable(name, indices, value=value)
             if data_error:
@@ -591,6 +674,45 @@ class Interpreter(object):
             else:
                 self.data_pos = data_pos
 
+    def _read_data_item(self, is_string):
+        """
+        Parse the DATA item at the data pointer.
+        Return the item's text, string address, position, error flag and next position.
+        """
+        self._program_code.seek(self.data_pos)
+        if self._program_code.peek() in tk.END_STATEMENT:
+            # initialise - find first DATA
+            self._program_code.skip_to_token(tk.DATA,)
+        if self._program_code.read(1) not in (tk.DATA, b','):
+            return None
+        self._program_code.skip_blank()
+        item_pos = self._program_code.tell()
+        data_error = False
+        address = None
+        if is_string:
+            # for unquoted strings, payload starts at the first non-empty character
+            address = self._program_code.tell_address()
+            word = self._program_code.read_to((b',', b'"',) + tk.END_STATEMENT)
+            if self._program_code.peek() == b'"':
+                if word == b'':
+                    # nothing before the quotes, so this is a quoted string literal
+                    # string payload starts after quote
+                    address = self._program_code.tell_address() + 1
+                    word = self._program_code.read_string().strip(b'"')
+                else:
+                    # complete unquoted string literal
+                    word += self._program_code.read_string()
+                if (self._program_code.skip_blank() not in (tk.END_STATEMENT + (b',',))):
+                    raise error.BASICError(error.STX)
+            else:
+                word = word.strip(self._program_code.blanks)
+        else:
+            word = self._program_code.read_number()
+            # anything after the number is a syntax error, but assignment has taken place)
+            if (self._program_code.skip_blank() not in (tk.END_STATEMENT + (b',',))):
+                data_error = True
+        return word, address, item_pos, data_error, self._program_code.tell()
+
     ###########################################################################
     # COMMON
 
@@ -8,6 +8,7 @@ This file is released under the GNU GPL version 3 or later.
 
 import binascii
 import struct
+from bisect import bisect_right
 
 from ...compat import iteritems, iterkeys
 
@@ -22,6 +23,8 @@ class Arrays(object):
         """Initialise arrays."""
         self._memory = memory
         self._values = values
+        # number of arrays allocated
+        self.allocations = 0
         self.clear()
         self.clear_base()
 
@@ -48,7 +51,12 @@ class Arrays(object):
         """Clear arrays."""
         self._dims = {}
         self._buffers = {}
+        # element strides for each dimension, computed on allocation
+        self._strides = {}
         self._array_memory = {}
+        # name pointers in ascending order and the corresponding names, for address lookup
+        self._name_ptrs = []
+        self._names = []
         self.current = 0
 
     def erase_(self, args):
@@ -65,6 +73,7 @@ class Arrays(object):
             # delete buffers
             del self._dims[name]
             del self._buffers[name]
+            del self._strides[name]
             del self._array_memory[name]
             # update memory model
             for name in self._array_memory:
@@ -72,6 +81,8 @@ class Arrays(object):
                 if name_ptr > erased_name_ptr:
                     self._array_memory[name] = name_ptr - freed_bytes, array_ptr - freed_bytes
             self.current -= freed_bytes
+            self._names = sorted(self._array_memory, key=lambda _name: self._array_memory[_name])
+            self._name_ptrs = [self._array_memory[_name][0] for _name in self._names]
         # if all arrays have been cleared and array base was set to 0 implicitly by DIM, unset it
         # however, if array base was set explicitly by OPTION BASE, it remains set.
         if not self._dims and self._base_set_by_dim:
@@ -87,6 +98,15 @@ class Arrays(object):
             area *= dimensions[i] + 1 - self._base
         return bigindex
 
+    def _get_strides(self, dimensions):
+        """Return the number of elements spanned by a unit step in each index."""
+        strides = []
+        area = 1
+        for d in dimensions:
+            strides.append(area)
+            area *= d + 1 - self._base
+        return strides
+
     def view_full_buffer(self, name):
         """Return a memoryview to a full array."""
         return memoryview(self._buffers[name])
@@ -147,8 +167,13 @@ class Arrays(object):
         self._memory.check_free(total_bytes, error.OUT_OF_MEMORY)
         self.current += total_bytes
         self._array_memory[name] = (name_ptr, array_ptr)
+        # records are only ever added at the top of array space
+        self._name_ptrs.append(name_ptr)
+        self._names.append(name)
         self._buffers[name] = bytearray(array_bytes)
         self._dims[name] = dimensions
+        self._strides[name] = self._get_strides(dimensions)
+        self.allocations += 1
 
     def check_dim(self, name, index):
         """
@@ -191,10 +216,24 @@ class Arrays(object):
 
     def view_buffer(self, name, index):
         """Return a memoryview to an array element."""
-        dimensions, lst = self.check_dim(name, index)
-        bigindex = self.index(index, dimensions)
+        try:
+            dimensions = self._dims[name]
+        except KeyError:
+            # auto-dimension through check_dim
+            dimensions, _ = self.check_dim(name, index)
+        if len(index) != len(dimensions):
+            raise error.BASICError(error.SUBSCRIPT_OUT_OF_RANGE)
+        base = self._base
+        bigindex = 0
+        for i, d, stride in zip(index, dimensions, self._strides[name]):
+            if i < 0:
+                raise error.BASICError(error.IFC)
+            elif i < base or i > d:
+                # dimensions is the *maximum index number*, regardless of self._base
+                raise error.BASICError(error.SUBSCRIPT_OUT_OF_RANGE)
+            bigindex += (i - base) * stride
         bytesize = values.size_bytes(name)
-        return memoryview(lst)[bigindex*bytesize:(bigindex+1)*bytesize]
+        return memoryview(self._buffers[name])[bigindex*bytesize:(bigindex+1)*bytesize]
 
     def get(self, name, index):
         """Retrieve a view of the value of an array element."""
@@ -220,33 +259,31 @@ class Arrays(object):
             values.size_bytes(name) * self.index(indices, dimensions)
         )
 
+    def _find(self, offset):
+        """Return the index of the last array record starting at or below offset into array space."""
+        return bisect_right(self._name_ptrs, offset) - 1
+
     def dereference(self, address):
         """Get a value for an array given its pointer address."""
-        found_addr = -1
-        found_name = None
-        for name, data in iteritems(self._array_memory):
-            addr = self._memory.var_current() + data[1]
-            if addr > found_addr and addr <= address:
-                found_addr = addr
-                found_name = name
-        if not found_name:
+        offset = address - self._memory.var_current()
+        index = self._find(offset)
+        if index >= 0 and self._array_memory[self._names[index]][1] > offset:
+            # address is in the header of this array, so past the data of the one before
+            index -= 1
+        if index < 0:
             return None
+        name = self._names[index]
         lst = self._buffers[name]
-        offset = address - found_addr
+        offset -= self._array_memory[name][1]
         return self._values.from_bytes(lst[offset : offset+values.size_bytes(name)])
 
     def get_memory(self, address):
         """Retrieve data from data memory: array space """
-        name_addr = -1
-        arr_addr = -1
-        for name in self._array_memory:
-            name_try, arr_try = self._array_memory[name]
-            if name_try <= address and name_try > name_addr:
-                name_addr, arr_addr = name_try, arr_try
-                the_arr = name
-                break
-        else: # pragma: no cover
+        index = self._find(address - self._memory.var_current())
+        if index < 0: # pragma: no cover
             return -1
+        the_arr = self._names[index]
+        name_addr, arr_addr = self._array_memory[the_arr]
         var_current = self._memory.var_current()
         dimensions = self._dims[the_arr]
         if address >= var_current + arr_addr:
@@ -298,6 +335,33 @@ class Arrays(object):
             for i, v in enumerate(python_list):
                 self.set(name, index+[i+(self._base or 0)], self._values.from_value(v, name[-1:]))
 
+    def from_buffer(self, name, data):
+        """Copy values in memory representation from a buffer into a numeric array."""
+        if name[-1:] == values.STR:
+            raise ValueError('Array must be numeric.')
+        data = memoryview(data)
+        nbytes = data.itemsize
+        for extent in data.shape:
+            nbytes *= extent
+        if name not in self._dims:
+            count, remainder = divmod(nbytes, values.size_bytes(name))
+            if not count or remainder:
+                raise ValueError('Buffer must hold a whole, nonzero number of elements.')
+            # allocate a one-dimensional array to hold the values
+            self.allocate(name, [count - 1 + (self._base or 0)])
+        buf = self._buffers[name]
+        if nbytes != len(buf):
+            raise ValueError('Buffer size %d does not match array size %d.' % (nbytes, len(buf)))
+        buf[:] = data
+
+    def to_buffer(self, name):
+        """Return a copy of a numeric array in memory representation."""
+        if name[-1:] == values.STR:
+            raise ValueError('Array must be numeric.')
+        if name not in self._dims:
+            return b''
+        return bytes(self._buffers[name])
+
     def to_list(self, name):
         """Convert BASIC array to Python list."""
         if name not in self._dims:
@@ -154,6 +154,7 @@ class DataSegment(object):
     def clear_deftype(self):
         """Reset default sigils."""
         self.deftype = [values.SNG]*26
+        self.scalars.invalidate_slots()
 
     def deftype_(self, sigil, args):
         """DEFSTR/DEFINT/DEFSNG/DEFDBL: set type defaults for variables."""
@@ -164,6 +165,8 @@ class DataSegment(object):
             else:
                 stop = start
             self.deftype[start:stop+1] = [sigil] * (stop-start+1)
+        # names without sigil may now refer to other variables
+        self.scalars.invalidate_slots()
 
     def defint_(self, args):
         """Set default integer variables."""
@@ -7,6 +7,7 @@ This file is released under the GNU GPL version 3 or later.
 """
 
 import struct
+from bisect import bisect_right
 
 from ...compat import iteritems, iterkeys
 
@@ -21,6 +22,10 @@ class Scalars(object):
         """Initialise scalars."""
         self._memory = memory
         self._values = values
+        # version of the variable slots; compiled references resolve again when it changes
+        self.version = 0
+        # number of variables allocated
+        self.allocations = 0
         self.clear()
 
     def __contains__(self, varname):
@@ -42,7 +47,15 @@ class Scalars(object):
         """Clear scalar variables."""
         self._vars = {}
         self._var_memory = {}
+        # name pointers in ascending order and the corresponding names, for address lookup
+        self._name_ptrs = []
+        self._names = []
         self.current = 0
+        self.invalidate_slots()
+
+    def invalidate_slots(self):
+        """Discard slots that resolved names to variable buffers."""
+        self.version += 1
 
     @staticmethod
     def _record_size(name):
@@ -79,6 +92,10 @@ class Scalars(object):
             var_ptr = name_ptr + self._record_size(name)
             self.current += size
             self._var_memory[name] = (name_ptr, var_ptr)
+            # records are only ever added at the top of scalar space
+            self._name_ptrs.append(name_ptr)
+            self._names.append(name)
+            self.allocations += 1
         # don't change the value if just checking allocation
         if value is None:
             if name in self._vars:
@@ -109,30 +126,35 @@ class Scalars(object):
         """Retrieve a view of an existing scalar variable's buffer."""
         return memoryview(self._vars[name])
 
+    def get_slot(self, name):
+        """Retrieve the backing buffer of an existing scalar variable, or None."""
+        return self._vars.get(name)
+
     def varptr(self, name):
         """Retrieve the address of a scalar variable."""
         _, var_ptr = self._var_memory[name]
         return var_ptr
 
+    def _find(self, address):
+        """Return the name of the variable whose record contains address, or None."""
+        index = bisect_right(self._name_ptrs, address) - 1
+        if index < 0:
+            return None
+        return self._names[index]
+
     def dereference(self, address):
         """Get a value for a scalar given its pointer address."""
-        for name, data in iteritems(self._var_memory):
-            if data[1] == address:
-                return self.get(name)
+        name = self._find(address)
+        if name is not None and self._var_memory[name][1] == address:
+            return self.get(name)
         return None
 
     def get_memory(self, address):
         """Retrieve data from data memory: variable space """
-        name_addr = -1
-        var_addr = -1
-        the_var = None
-        for name in self._var_memory:
-            name_try, var_try = self._var_memory[name]
-            if name_try <= address and name_try > name_addr:
-                name_addr, var_addr = name_try, var_try
-                the_var = name
+        the_var = self._find(address)
         if the_var is None: # pragma: no cover
             return -1
+        name_addr, var_addr = self._var_memory[the_var]
         if address >= var_addr:
             offset = address - var_addr
             if offset >= values.size_bytes(the_var): # pragma: no cover
@@ -21,14 +21,37 @@ from . import operators as op
 from . import userfunctions
 
 
+class _NotCompilable(Exception):
+    """Expression uses syntax that is only supported by the parser."""
+
+
+def _push_clone(value, units):
+    """Evaluation step: put a copy of a constant on the stack."""
+    units.append(value.clone())
+
+def _apply_unary(oper, units):
+    """Evaluation step: apply unary operator to the top of the stack."""
+    units.append(oper(units.pop()))
+
+def _apply_binary(oper, units):
+    """Evaluation step: apply binary operator to the top two units of the stack."""
+    right = units.pop()
+    units.append(oper(units.pop(), right))
+
+
 class ExpressionParser(object):
     """Expression parser."""
 
-    def __init__(self, values, memory):
+    def __init__(self, values, memory, code_cache=True):
         """Initialise empty expression."""
         self._values = values
         # for variable retrieval
         self._memory = memory
+        # compiled program expressions by code position, or None to parse on every evaluation
+        self._compiled = {} if code_cache else None
+        self._compiled_version = None
+        # number of (sub-)expressions evaluated
+        self.evaluations = 0
         # user-defined functions
         self.user_functions = userfunctions.UserFunctionManager(memory, values, self)
         # initialise syntax tables
@@ -223,6 +246,8 @@ class ExpressionParser(object):
         pickle_dict['_simple'] = None
         pickle_dict['_complex'] = None
         pickle_dict['_callbacks'] = None
+        if self._compiled is not None:
+            pickle_dict['_compiled'] = {}
         return pickle_dict
 
     def __setstate__(self, pickle_dict):
@@ -237,6 +262,17 @@ class ExpressionParser(object):
 
     def parse(self, ins):
         """Parse and evaluate tokenised (sub-)expression."""
+        self.evaluations += 1
+        if self._compiled is not None and ins is self._memory.program.bytecode:
+            compiled = self._get_compiled(ins)
+            if compiled:
+                steps, end = compiled
+                ins.seek(end)
+                return self._evaluate(steps)
+        return self._parse(ins)
+
+    def _parse(self, ins):
+        """Parse and evaluate tokenised (sub-)expression without using compiled code."""
         operations = deque()
         with self._memory.get_stack() as units:
             final = True
@@ -330,6 +366,227 @@ class ExpressionParser(object):
             args = reversed([units.pop() for _ in range(narity)])
             units.append(oper(*args))
 
+    ###########################################################################
+    # compiled expressions
+
+    def _get_compiled(self, ins):
+        """Get compiled steps and end position for program expression, None if not compilable."""
+        program = self._memory.program
+        if self._compiled_version != program.code_version:
+            # program has been changed, positions and contents are no longer valid
+            self._compiled.clear()
+            self._compiled_version = program.code_version
+        start = ins.tell()
+        try:
+            return self._compiled[start]
+        except KeyError:
+            pass
+        try:
+            compiled = self._compile(ins), ins.tell()
+        except (error.BASICError, _NotCompilable):
+            # leave it to the parser to raise any errors at the right time and place
+            compiled = None
+        ins.seek(start)
+        self._compiled[start] = compiled
+        return compiled
+
+    def _evaluate(self, steps):
+        """Evaluate a compiled (sub-)expression."""
+        with self._memory.get_stack() as units:
+            for step in steps:
+                step(units)
+            return units[0]
+
+    def _compile(self, ins):
+        """Compile tokenised (sub-)expression into evaluation steps, following parse()."""
+        steps = []
+        operations = deque()
+        # number of units on the stack at evaluation time
+        depth = 0
+        d = b''
+        while True:
+            last = d
+            ins.skip_blank()
+            d = ins.read_keyword_token()
+            ins.seek(-len(d), 1)
+            if d == tk.NOT and not (last in op.OPERATORS or last == b''):
+                break
+            elif d in op.OPERATORS:
+                ins.read(len(d))
+                if d in op.COMBINABLE:
+                    nxt = ins.skip_blank()
+                    if nxt in op.COMBINABLE:
+                        d += ins.read(len(nxt))
+                if last in op.OPERATORS or last == b'' or d == tk.NOT:
+                    nargs = 1
+                    try:
+                        oper = op.UNARY[d]
+                        prec = op.PRECEDENCE[(d, nargs)]
+                    except KeyError:
+                        raise error.BASICError(error.STX)
+                else:
+                    nargs = 2
+                    try:
+                        oper = op.BINARY[d]
+                        prec = op.PRECEDENCE[(d, nargs)]
+                    except KeyError:
+                        raise error.BASICError(error.STX)
+                    depth = self._compile_drain(prec, operations, steps, depth)
+                operations.append((oper, nargs, prec))
+            elif not (last in op.OPERATORS or last == b''):
+                break
+            elif d == b'(':
+                ins.read(len(d))
+                # parenthesised sub-expressions are evaluated on the same stack
+                steps.extend(self._compile(ins))
+                ins.require_read((b')',))
+                depth += 1
+            elif d and d in LETTERS:
+                name = ins.read_name()
+                error.throw_if(not name, error.STX)
+                indices = self._compile_indices(ins)
+                if indices:
+                    steps.append(partial(self._push_variable, name, indices))
+                else:
+                    # slot holds the scalars version and the resolved buffer
+                    steps.append(partial(self._push_scalar, name, [None, None]))
+                depth += 1
+            elif d in self._simple:
+                steps.append(self._compile_function(ins, d))
+                depth += 1
+            elif d in self._functions:
+                # functions with special syntax are left to the parser
+                raise _NotCompilable()
+            elif d in tk.END_STATEMENT or d in tk.END_EXPRESSION:
+                break
+            elif d == b'"':
+                # +1 to point to start of payload, not intial quote
+                address = ins.tell_address() + 1
+                value = ins.read_string().strip(b'"')
+                steps.append(partial(self._push_string_literal, value, address))
+                depth += 1
+            else:
+                steps.append(self._compile_number_literal(ins))
+                depth += 1
+        if self._compile_drain(0, operations, steps, depth) != 1:
+            # missing operand is raised by the parser
+            raise _NotCompilable()
+        return steps
+
+    def _compile_drain(self, precedence, operations, steps, depth):
+        """Add operator steps until an operator of low precedence on top; return stack depth."""
+        while operations:
+            if precedence > operations[-1][2]:
+                break
+            oper, narity, _ = operations.pop()
+            if depth < narity:
+                raise _NotCompilable()
+            if narity == 1:
+                steps.append(partial(_apply_unary, oper))
+            else:
+                steps.append(partial(_apply_binary, oper))
+            depth -= narity - 1
+        return depth
+
+    def _compile_indices(self, ins):
+        """Compile array indices."""
+        indices = []
+        if ins.skip_blank_read_if((b'[', b'(')):
+            while True:
+                indices.append(self._compile(ins))
+                if not ins.skip_blank_read_if((b',',)):
+                    break
+            ins.require_read((b']', b')'))
+        return indices
+
+    def _compile_function(self, ins, token):
+        """Compile a function with simple argument syntax."""
+        ins.read(len(token))
+        parse_args = self._simple[token]
+        length = getattr(parse_args, 'keywords', {}).get('length', 1)
+        parse_args = getattr(parse_args, 'func', parse_args)
+        # compiled arguments; None for an omitted optional argument
+        args = []
+        if parse_args == self._no_argument:
+            pass
+        elif parse_args == self._gen_parse_arguments:
+            ins.require_read((b'(',))
+            for i in range(length-1):
+                args.append(self._compile(ins))
+                ins.require_read((b',',))
+            args.append(self._compile(ins))
+            ins.require_read((b')',))
+        elif parse_args == self._gen_parse_arguments_optional:
+            ins.require_read((b'(',))
+            args.append(self._compile(ins))
+            for _ in range(length-2):
+                ins.require_read((b',',))
+                args.append(self._compile(ins))
+            if ins.skip_blank_read_if((b',',)):
+                args.append(self._compile(ins))
+            else:
+                args.append(None)
+            ins.require_read((b')',))
+        elif parse_args == self._gen_parse_one_optional_argument:
+            if ins.skip_blank_read_if((b'(',)):
+                args.append(self._compile(ins))
+                ins.require_read((b')',))
+            else:
+                args.append(None)
+        else:
+            raise _NotCompilable()
+        return partial(self._push_function, token, args)
+
+    def _compile_number_literal(self, ins):
+        """Compile a numeric literal (no leading blanks)."""
+        d = ins.peek()
+        if d in DIGITS:
+            # conversion may raise Overflow, so do it at evaluation time
+            return partial(self._push_number_repr, ins.read_number())
+        elif d in tk.NUMBER:
+            value = self._values.from_token(ins.read_number_token())
+        elif d == tk.T_UINT:
+            value = struct.unpack('<bH', ins.read(3))[1]
+            value = self._values.new_single().from_int(value)
+        else:
+            raise error.BASICError(error.STX)
+        return partial(_push_clone, value)
+
+    def _push_variable(self, name, indices, units):
+        """Evaluation step: put variable on the stack."""
+        indices = [values.to_int(self._evaluate(_index)) for _index in indices]
+        # should make a shallow copy? but .clone here breaks circular MID$
+        units.append(self._memory.view_or_create_variable(name, indices))
+
+    def _push_scalar(self, name, slot, units):
+        """Evaluation step: put scalar variable on the stack, resolving its name once."""
+        scalars = self._memory.scalars
+        if slot[0] != scalars.version:
+            buf = scalars.get_slot(self._memory.complete_name(name))
+            if buf is None:
+                # not yet allocated; resolve again next time
+                units.append(self._memory.view_or_create_variable(name, []))
+                return
+            slot[:] = scalars.version, buf
+        units.append(self._values.create(slot[1]))
+
+    def _push_function(self, token, args, units):
+        """Evaluation step: put function result on the stack."""
+        units.append(self._callbacks[token](self._gen_compiled_arguments(args)))
+
+    def _gen_compiled_arguments(self, args):
+        """Evaluate compiled arguments as they are requested by the function."""
+        for arg in args:
+            yield None if arg is None else self._evaluate(arg)
+
+    def _push_string_literal(self, value, address, units):
+        """Evaluation step: put string literal on the stack."""
+        units.append(self._values.from_str_at(value, address))
+
+    def _push_number_repr(self, word, units):
+        """Evaluation step: put ascii numeric literal on the stack."""
+        units.append(self._values.from_repr(word, allow_nonnum=False))
+
     def read_string_literal(self, ins):
         """Read a quoted string literal (no leading blanks), return as String."""
         # address points to initial quote
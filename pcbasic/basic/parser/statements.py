@@ -22,12 +22,12 @@ from . import userfunctions
 class Parser(object):
     """BASIC statement parser."""
 
-    def __init__(self, values, memory, syntax):
+    def __init__(self, values, memory, syntax, code_cache=True):
         """Initialise statement context."""
         # re-execute current statement after Break
         self.redo_on_break = False
         # expression parser
-        self.expression_parser = expressions.ExpressionParser(values, memory)
+        self.expression_parser = expressions.ExpressionParser(values, memory, code_cache)
         self.user_functions = self.expression_parser.user_functions
         # syntax: advanced, pcjr, tandy
         self._syntax = syntax
@@ -55,6 +55,14 @@ class Parser(object):
 
     def parse_statement(self, ins):
         """Parse and execute a single statement."""
+        decoded = self.decode_statement(ins)
+        if decoded:
+            callback, parse_args = decoded
+            callback(parse_args(ins))
+        # end-of-statement is checked at start of next statement in interpreter loop
+
+    def decode_statement(self, ins):
+        """Read the statement keyword; return callback and argument parser, or None if empty."""
         # read keyword token or one byte
         ins.skip_blank()
         c = ins.read_keyword_token()
@@ -78,9 +86,8 @@ class Parser(object):
                 parse_args = self._simple[tk.LET]
             else:
                 ins.require_end()
-                return
-        self._callbacks[c](parse_args(ins))
-        # end-of-statement is checked at start of next statement in interpreter loop
+                return None
+        return self._callbacks[c], parse_args
 
     def parse_name(self, ins):
         """Get scalar part of variable name from token stream."""
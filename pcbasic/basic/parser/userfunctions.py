@@ -29,34 +29,56 @@ class UserFunction(object):
         self._varnames = varnames
         self._sigil = name[-1:]
         self._expression_parser = expression_parser
+        # parameter names with sigil and their conversions, for the current scalars version
+        self._params = None
+
+    def __getstate__(self):
+        """Pickle."""
+        pickle_dict = self.__dict__.copy()
+        # resolved parameters refer to variable buffers
+        pickle_dict['_params'] = None
+        return pickle_dict
 
     def number_arguments(self):
         """Retrieve number of arguments."""
         return len(self._varnames)
 
+    def _resolve_params(self):
+        """Complete parameter names, once per change of variables or type definitions."""
+        scalars = self._memory.scalars
+        if self._params is None or self._params[0] != scalars.version:
+            names = [self._memory.complete_name(_v) for _v in self._varnames]
+            conversions = [values.TYPE_TO_CONV[_name[-1:]] for _name in names]
+            # variable buffers, to be filled in when the variables are allocated
+            self._params = [scalars.version, names, conversions, None]
+        return self._params
+
     def evaluate(self, iargs):
         """Evaluate user-defined function."""
+        params = self._resolve_params()
+        _, varnames, conversions, buffers = params
         # parse/evaluate arguments
-        conversions = (values.TYPE_TO_CONV[self._memory.complete_name(name)[-1:]] for name in self._varnames)
         args = [conv(arg) for arg, conv in zip(iargs, conversions)]
         # recursion is not allowed as there's no way to terminate it
         if self._is_parsing:
             raise error.BASICError(error.OUT_OF_MEMORY)
         # parse/evaluate function expression
+        scalars = self._memory.scalars
+        if buffers is None:
+            for name in varnames:
+                # set to 0 if they don't yet exist
+                if name not in scalars:
+                    scalars.set(name)
+            buffers = params[3] = [scalars.get_slot(_name) for _name in varnames]
         # save existing vars
-        varsave = {}
-        varnames = [self._memory.complete_name(_v) for _v in self._varnames]
-        for name in varnames:
-            # set to 0 if they don't yet exist
-            if name not in self._memory.scalars:
-                self._memory.scalars.set(name)
-            # copy the buffer
-            varsave[name] = self._memory.scalars.view(name).clone()
+        varsave = [bytes(_buf) for _buf in buffers]
         # set variables
-        for name, value in zip(varnames, args):
-            # append sigil, if missing
-            name = self._memory.complete_name(name)
-            self._memory.scalars.set(name, value)
+        for name, buf, value in zip(varnames, buffers, args):
+            if isinstance(value, values.String):
+                # string space needs to keep the argument
+                scalars.set(name, value)
+            else:
+                buf[:] = value.to_bytes()
         # set recursion flag
         self._is_parsing = True
         save_loc = self._codestream.tell()
@@ -68,11 +90,10 @@ class UserFunction(object):
             self._codestream.seek(save_loc)
             # unset recursion flag
             self._is_parsing = False
-            # restore existing vars, remove ones added
-            for name in varsave:
+            # restore existing vars
+            for buf, saved in zip(buffers, varsave):
                 # re-assign the stored value
-                self._memory.scalars.view(name).copy_from(varsave[name])
-
+                buf[:] = saved
 
 
 class UserFunctionManager(object):
@@ -0,0 +1,144 @@
+"""
+PC-BASIC - profiler.py
+Per-line execution profiler for BASIC programs and session start-up timer
+
+(c) 2013--2023 Rob Hagemans
+This file is released under the GNU GPL version 3 or later.
+"""
+
+import json
+import time
+import struct
+
+from ..compat import iteritems, text_type
+
+
+class Profiler(object):
+    """Record execution counts and wall time of program lines and statements."""
+
+    def __init__(self, program, queues, sound, strings):
+        """Start profiling."""
+        self._program = program
+        self._queues = queues
+        self._sound = sound
+        self._strings = strings
+        # number of times execution passed the start of each line, by line number
+        self._line_hits = {}
+        # hits and cumulative time of statements, by (line number, code position)
+        self._statement_hits = {}
+        self._statement_times = {}
+        # line numbers of code positions, for the current program version
+        self._keys = {}
+        self._code_version = None
+        # statement being timed
+        self._current = None
+        self._current_start = 0
+        self._start_time = time.time()
+        self._start_waits = self._get_waits()
+
+    def _get_waits(self):
+        """Get cumulative time spent waiting and collecting garbage."""
+        sound_wait = self._sound.wait_time
+        return {
+            # sound waits go through the event queues, too
+            u'input': self._queues.wait_time - sound_wait,
+            u'sound': sound_wait,
+            u'string_gc': self._strings.gc_time,
+        }
+
+    def count_line(self, token):
+        """Count a pass through the start of a program line."""
+        linenum, = struct.unpack_from('<H', token, 2)
+        self._line_hits[linenum] = self._line_hits.get(linenum, 0) + 1
+
+    def mark(self, pos):
+        """Start timing the statement at the given code position; None if not in a program."""
+        now = time.time()
+        if self._current is not None:
+            self._statement_times[self._current] += now - self._current_start
+        if pos is None:
+            self._current = None
+            return
+        if self._code_version != self._program.code_version:
+            # positions change with the program
+            self._code_version = self._program.code_version
+            self._keys = {}
+        try:
+            key = self._keys[pos]
+        except KeyError:
+            key = self._keys[pos] = (self._program.get_line_number(pos), pos)
+            self._statement_times.setdefault(key, 0.)
+        if key[0] > 65535:
+            # running off the end of the program
+            self._current = None
+            return
+        self._statement_hits[key] = self._statement_hits.get(key, 0) + 1
+        self._current = key
+        self._current_start = now
+
+    def get_profile(self):
+        """Get the profile as a dictionary, with lines and statements sorted by time spent."""
+        lines = {}
+        for key, hits in iteritems(self._statement_hits):
+            linenum, _ = key
+            line = lines.setdefault(linenum, {
+                u'line': linenum, u'hits': self._line_hits.get(linenum, 0),
+                u'statements': 0, u'time': 0.,
+            })
+            line[u'statements'] += hits
+            line[u'time'] += self._statement_times[key]
+        statements = [
+            {
+                u'line': _key[0], u'position': _key[1],
+                u'hits': _hits, u'time': self._statement_times[_key],
+            }
+            for _key, _hits in iteritems(self._statement_hits)
+        ]
+        waits = self._get_waits()
+        return {
+            u'total_time': time.time() - self._start_time,
+            u'lines': sorted(lines.values(), key=lambda _l: (-_l[u'time'], _l[u'line'])),
+            u'statements': sorted(statements, key=lambda _s: (-_s[u'time'], _s[u'position'])),
+            u'waits': {
+                _name: waits[_name] - self._start_waits[_name]
+                for _name in waits
+            },
+        }
+
+    def get_report(self):
+        """Get a text report of the lines that took most time, as a list of lines."""
+        profile = self.get_profile()
+        total = max(profile[u'total_time'], 1e-9)
+        report = [u'%8s %10s %10s %10s %6s' % (u'line', u'hits', u'statements', u'time', u'%')]
+        for line in profile[u'lines']:
+            report.append(u'%8d %10d %10d %10.4f %6.2f' % (
+                line[u'line'], line[u'hits'], line[u'statements'], line[u'time'],
+                100. * line[u'time'] / total
+            ))
+        waits = profile[u'waits']
+        report.extend((
+            u'waiting for input and devices: %.4f' % (waits[u'input'],),
+            u'waiting for sound: %.4f' % (waits[u'sound'],),
+            u'string garbage collection: %.4f' % (waits[u'string_gc'],),
+            u'total: %.4f' % (profile[u'total_time'],),
+        ))
+        return report
+
+    def write_json(self, stream):
+        """Write the profile to a text stream as JSON."""
+        stream.write(text_type(json.dumps(self.get_profile(), indent=1)))
+
+
+class StartupTimer(object):
+    """Record the time taken to set up each subsystem of a session."""
+
+    def __init__(self):
+        """Start timing."""
+        self._last = time.time()
+        self.times = []
+
+    def mark(self, name):
+        """Record the time since the previous mark as spent on setting up the named subsystem."""
+        now = time.time()
+        self.times.append((name, now - self._last))
+        self._last = now
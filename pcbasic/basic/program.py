@@ -10,8 +10,9 @@ import binascii
 import logging
 import struct
 import io
+from bisect import bisect_right
 
-from ..compat import int2byte
+from ..compat import int2byte, iteritems
 
 from .base import error
 from .base import tokens as tk
@@ -27,7 +28,16 @@ class Program(object):
         """Initialise program."""
         self._memory = memory
         # program bytecode buffer
-        self.bytecode = bytecode
+        self._bytecode = bytecode
+        # line edits not yet written to the bytecode, by line number; None for deleted lines
+        self._pending = {}
+        # line lengths and end of code as they will be after the pending edits are written
+        self._lengths = None
+        self._code_end = 0
+        self._tail_length = 0
+        # incremented whenever the code changes, so that decoded statements can be discarded
+        self.code_version = 0
+        self._line_index = None
         self.erase()
         self.max_list_line = hide_listing if hide_listing else 65535
         self.allow_protect = allow_protect
@@ -67,16 +77,43 @@ class Program(object):
         ))
         return b'\n'.join(output).decode('ascii', 'replace')
 
+    @property
+    def bytecode(self):
+        """Program bytecode buffer, with all line edits written."""
+        if self._pending:
+            self.materialise()
+        return self._bytecode
+
+    @property
+    def line_numbers(self):
+        """Dictionary of code positions by line number, with all line edits written."""
+        if self._pending:
+            self.materialise()
+        return self._line_numbers
+
+    def materialise(self):
+        """Write pending line edits to the bytecode."""
+        pending, self._pending, self._lengths = self._pending, {}, None
+        self._store_lines(pending)
+
+    def has_line(self, linum):
+        """Check if a line number is in the program, without writing pending edits."""
+        if self._lengths is not None:
+            return linum in self._lengths
+        return linum in self._line_numbers
+
     def size(self):
         """Size of code space """
         return self.code_size
 
     def erase(self):
         """Erase the program from memory."""
+        self._pending, self._lengths = {}, None
         self.bytecode.seek(0)
         self.bytecode.write(b'\0\0\0')
         self.protected = False
-        self.line_numbers = {65536: 0}
+        self._line_numbers = {65536: 0}
+        self._invalidate_caches()
         self.last_stored = None
         self.code_size = self.bytecode.tell()
         self.bytecode.truncate()
@@ -94,19 +131,38 @@ class Program(object):
 
     def get_line_number(self, pos):
         """Get line number for stream position."""
-        pre = -1
         if pos is None:
             pos = -1
-        for linum in self.line_numbers:
-            linum_pos = self.line_numbers[linum]
-            if linum_pos <= pos and linum > pre:
-                pre = linum
-        return pre
+        positions, line_maxima = self._get_line_index()
+        index = bisect_right(positions, pos)
+        if not index:
+            return -1
+        return line_maxima[index-1]
+
+    def _get_line_index(self):
+        """Get sorted line positions and highest line number at or before each position."""
+        if self._line_index is None:
+            # lines are normally stored in order, but a loaded bytecode file need not be
+            # so keep the running maximum to find the highest line number starting before pos
+            positions, line_maxima = [], []
+            highest = -1
+            for pos, linum in sorted((_pos, _linum) for _linum, _pos in iteritems(self.line_numbers)):
+                highest = max(highest, linum)
+                positions.append(pos)
+                line_maxima.append(highest)
+            self._line_index = positions, line_maxima
+        return self._line_index
+
+    def _invalidate_caches(self):
+        """Drop the line index and mark decoded code stale after the program has changed."""
+        self._line_index = None
+        self.code_version += 1
 
     def rebuild_line_dict(self):
         """Preparse to build line number dictionary."""
-        self.line_numbers, offsets = {}, []
         self.bytecode.seek(0)
+        self._invalidate_caches()
+        self._line_numbers, offsets = {}, []
         scanline, scanpos, last = 0, 0, 0
         while True:
             # pass \x00
@@ -156,6 +212,7 @@ class Program(object):
             del self.line_numbers[key]
         for key in beyond:
             self.line_numbers[key] += length
+        self._invalidate_caches()
 
     def check_number_start(self, linebuf):
         """Check if the given line buffer starts with a line number."""
@@ -179,6 +236,27 @@ class Program(object):
         scanline = self.lister.detokenise_line_number(linebuf)
         # check if linebuf is an empty line after the line number
         empty = (linebuf.skip_blank_read() in tk.END_LINE)
+        if self._lengths is None and self._is_well_formed():
+            # keep the edit until the code is needed, rather than moving the rest of the program
+            self._lengths = self._get_line_lengths()
+            self._code_end = self._line_numbers[65536]
+            self._tail_length = len(self._bytecode.getvalue()) - self._code_end
+        if self._lengths is not None:
+            if empty and scanline not in self._lengths:
+                raise error.BASICError(error.UNDEFINED_LINE_NUMBER)
+            length = 0 if empty else len(linebuf.getvalue())
+            # may be out of memory, depending on where the line goes: store it now
+            if self.code_start + 1 + self._code_end + length <= self._memory.stack_start():
+                self._code_end += length - self._lengths.pop(scanline, 0)
+                if empty:
+                    self._pending[scanline] = None
+                else:
+                    self._pending[scanline] = linebuf.getvalue()
+                    self._lengths[scanline] = length
+                self.code_size = self._code_end + self._tail_length
+                self.last_stored = scanline
+                return
+            self.materialise()
         pos, afterpos, deleteable, beyond = self.find_pos_line_dict(scanline, scanline)
         if empty and not deleteable:
             raise error.BASICError(error.UNDEFINED_LINE_NUMBER)
@@ -206,6 +284,7 @@ class Program(object):
         self.update_line_dict(pos, afterpos, length, deleteable, beyond)
         if not empty:
             self.line_numbers[scanline] = pos
+            self._invalidate_caches()
         self.last_stored = scanline
 
     def find_pos_line_dict(self, fromline, toline):
@@ -316,6 +395,7 @@ class Program(object):
             new_lines[old_to_new[old_line]] = self.line_numbers[old_line]
             del self.line_numbers[old_line]
         self.line_numbers.update(new_lines)
+        self._invalidate_caches()
         return old_to_new
 
     def load(self, g):
@@ -347,6 +427,56 @@ class Program(object):
 
     def merge(self, g):
         """Merge program from ascii or utf8 (if utf8_files is True) stream."""
+        if not self._is_well_formed():
+            return self._merge_by_line(g)
+        # tokenised lines to store by line number, None for lines to delete
+        pending = {}
+        # lengths of the lines in the program as it will be after storing the pending lines
+        lengths = self._get_line_lengths()
+        size = self.line_numbers[65536]
+        try:
+            while True:
+                line, cr = g.read_line()
+                if not line and not cr:
+                    # end of file
+                    break
+                elif cr is None:
+                    # line > 255 chars
+                    raise error.BASICError(error.LINE_BUFFER_OVERFLOW)
+                linebuf = self.tokeniser.tokenise_line(line)
+                if linebuf.read(1) == b'\0':
+                    # line starts with a number, add to program memory
+                    if self.protected:
+                        raise error.BASICError(error.IFC)
+                    linebuf.seek(1)
+                    scanline = self.lister.detokenise_line_number(linebuf)
+                    empty = (linebuf.skip_blank_read() in tk.END_LINE)
+                    if empty and scanline not in lengths:
+                        raise error.BASICError(error.UNDEFINED_LINE_NUMBER)
+                    length = 0 if empty else len(linebuf.getvalue())
+                    if self.code_start + 1 + size + length > self._memory.stack_start():
+                        # may be out of memory, depending on where the line goes: store it now
+                        self._store_lines(pending)
+                        pending = {}
+                        self.store_line(linebuf)
+                    elif empty:
+                        pending[scanline] = None
+                    else:
+                        pending[scanline] = linebuf.getvalue()
+                    size += length - lengths.pop(scanline, 0)
+                    if not empty:
+                        lengths[scanline] = length
+                    self.last_stored = scanline
+                else:
+                    # we have read the :
+                    if linebuf.skip_blank() not in tk.END_LINE:
+                        raise error.BASICError(error.DIRECT_STATEMENT_IN_FILE)
+        finally:
+            # lines before an error are kept
+            self._store_lines(pending)
+
+    def _merge_by_line(self, g):
+        """Merge program from ascii stream, storing each line as it is read."""
         while True:
             line, cr = g.read_line()
             if not line and not cr:
@@ -364,6 +494,60 @@ class Program(object):
                 if linebuf.skip_blank() not in tk.END_LINE:
                     raise error.BASICError(error.DIRECT_STATEMENT_IN_FILE)
 
+    def _get_line_lengths(self):
+        """Get the length of each stored line by line number."""
+        ordered = sorted((_pos, _linum) for _linum, _pos in iteritems(self.line_numbers))
+        return {
+            _linum: _next_pos - _pos
+            for (_pos, _linum), (_next_pos, _) in zip(ordered[:-1], ordered[1:])
+        }
+
+    def _is_well_formed(self):
+        """Check if lines are stored in order, with offsets pointing to the next line."""
+        code = self.bytecode.getvalue()
+        positions = sorted(self.line_numbers.values())
+        if positions[0] != 0:
+            return False
+        if [self.line_numbers[_linum] for _linum in sorted(self.line_numbers)] != positions:
+            return False
+        for pos, next_pos in zip(positions[:-1], positions[1:]):
+            if code[pos+1:pos+3] != struct.pack('<H', self.code_start + 1 + next_pos):
+                return False
+        return code[positions[-1]:positions[-1]+3] == b'\0\0\0'
+
+    def _store_lines(self, pending):
+        """Store or delete tokenised lines in one pass over the program."""
+        if not pending:
+            return
+        code = self.bytecode.getvalue()
+        end = self.line_numbers[65536]
+        lines = {
+            _linum: code[self.line_numbers[_linum]:self.line_numbers[_linum]+_length]
+            for _linum, _length in iteritems(self._get_line_lengths())
+        }
+        for linum, linebuf in iteritems(pending):
+            if linebuf is None:
+                lines.pop(linum, None)
+            else:
+                lines[linum] = linebuf
+        # rewrite the program with the next-line offsets for the new positions
+        output = []
+        pos = 0
+        self._line_numbers = {}
+        for linum in sorted(lines):
+            linebuf = lines[linum]
+            self._line_numbers[linum] = pos
+            pos += len(linebuf)
+            output.append(struct.pack('<BH', 0, self.code_start + 1 + pos) + linebuf[3:])
+        self._line_numbers[65536] = pos
+        # keep anything after the end of the program
+        output.append(code[end:] or b'\0\0\0')
+        self.bytecode.seek(0)
+        self.bytecode.write(b''.join(output))
+        self.bytecode.truncate()
+        self.code_size = self.bytecode.tell()
+        self._invalidate_caches()
+
     def save(self, g):
         """Save the program to stream g in (A)scii, (B)ytecode or (P)rotected mode."""
         mode = g.filetype
@@ -8,6 +8,7 @@ This file is released under the GNU GPL version 3 or later.
 
 from collections import deque
 import datetime
+import time
 
 from ..compat import iterchar, zip
 from .base import error
@@ -56,6 +57,8 @@ class Sound(object):
         self._queues = queues
         self._values = values
         self._memory = memory
+        # time spent waiting for the sound queue
+        self.wait_time = 0.
         # Tandy/PCjr noise generator
         # frequency for noise sources
         self._noise_freq = list(NOISE_FREQ)
@@ -209,8 +212,10 @@ class Sound(object):
     def _wait(self, wait_length):
         """Wait until queue is shorter than or equal to given length."""
         # top of queue is the currently playing tone or gap
+        start = time.time()
         while max(len(queue) for queue in self._voice_queue) > wait_length:
             self._queues.wait()
+        self.wait_time += time.time() - start
 
     def stop_all_sound(self):
         """Terminate all sounds immediately."""
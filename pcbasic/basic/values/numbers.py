@@ -26,7 +26,7 @@ import binascii
 import struct
 import math
 
-from ...compat import iterchar, int2byte
+from ...compat import iterchar, int2byte, iteritems
 
 from ..base import tokens as tk
 from ..base import error
@@ -46,6 +46,9 @@ SEPARATORS = b'\x1c\x1d\x1f'
 class Value(object):
     """Abstract base class for value types."""
 
+    # values are created for every intermediate result, keep them small
+    __slots__ = ('_buffer', '_values')
+
     sigil = None
     size = None
 
@@ -69,13 +72,20 @@ class Value(object):
             return '%s[%s <detached>]' % (sigil_repr, bytes_repr)
 
     def __getstate__(self):
+        """Pickle."""
+        pickle_dict = {
+            _name: getattr(self, _name)
+            for _cls in type(self).__mro__ for _name in getattr(_cls, '__slots__', ())
+        }
         # can't pickle memoryview
-        self._buffer = bytearray(self._buffer)
-        return self.__dict__
+        pickle_dict['_buffer'] = bytearray(self._buffer)
+        return pickle_dict
 
     def __setstate__(self, pickle_dict):
+        """Unpickle."""
+        for name, value in iteritems(pickle_dict):
+            setattr(self, name, value)
         # can't pickle memoryview
-        self.__dict__ = pickle_dict
         self._buffer = memoryview(self._buffer)
 
     def to_value(self):
@@ -83,7 +93,7 @@ class Value(object):
 
     def clone(self):
         """Create a copy."""
-        return self.__class__(None, self._values).from_bytes(self._buffer)
+        return self.__class__(bytearray(self._buffer), self._values)
 
     def new(self):
         """Create a new null value."""
@@ -114,6 +124,8 @@ class Value(object):
 class Number(Value):
     """Abstract base class for numeric value."""
 
+    __slots__ = ('error_handler',)
+
     zero = None
     pos_max = None
     neg_max = None
@@ -146,6 +158,8 @@ class Number(Value):
 class Integer(Number):
     """16-bit signed little-endian integer."""
 
+    __slots__ = ()
+
     sigil = b'%'
     size = 2
 
@@ -158,16 +172,12 @@ class Integer(Number):
 
     def is_negative(self):
         """Value is negative."""
-        return (bytearray(self._buffer)[-1] & 0x80) != 0
+        return struct.unpack('<h', self._buffer)[0] < 0
 
     def sign(self):
         """Sign of value."""
-        if (bytearray(self._buffer)[-1] & 0x80) != 0:
-            return -1
-        elif bytearray(self._buffer) == bytearray(b'\0\0'):
-            return 0
-        else:
-            return 1
+        value, = struct.unpack('<h', self._buffer)
+        return (value > 0) - (value < 0)
 
     def to_int(self, unsigned=False):
         """Return value as Python int."""
@@ -298,47 +308,27 @@ class Integer(Number):
 
     def ineg(self):
         """Negate in-place."""
-        if self._buffer == b'\x00\x80':
-            raise error.BASICError(error.OVERFLOW)
-        lsb = (bytearray(self._buffer)[0] ^ 0xff) + 1
-        msb = bytearray(self._buffer)[1] ^ 0xff
-        # apply carry
-        if lsb > 0xff:
-            lsb -= 0x100
-            msb += 1
-        # ignore overflow, since -0 == 0
-        self._buffer[:] = bytearray([lsb, msb & 0xff])
-        return self
+        # raises Overflow for -32768
+        return self.from_int(-struct.unpack('<h', self._buffer)[0])
 
     def iabs(self):
         """Absolute value in-place."""
-        if bytearray(self._buffer)[-1] & 0x80:
-            return self.ineg()
-        return self
+        return self.from_int(abs(struct.unpack('<h', self._buffer)[0]))
 
     def iadd(self, rhs):
         """Add another Integer in-place."""
-        lsb = bytearray(self._buffer)[0] + bytearray(rhs._buffer)[0]
-        msb = bytearray(self._buffer)[1] + bytearray(rhs._buffer)[1]
-        # apply carry
-        if lsb > 0xff:
-            lsb -= 0x100
-            msb += 1
-        # overflow if signs were equal and have changed
-        if (
-                (bytearray(self._buffer)[1] > 0x7f) ==
-                (bytearray(rhs._buffer)[1] > 0x7f) !=
-                (msb > 0x7f)
-            ):
-            raise error.BASICError(error.OVERFLOW)
-        self._buffer[:] = bytearray([lsb, msb & 0xff])
-        return self
+        # raises Overflow if the result is out of range
+        return self.from_int(
+            struct.unpack('<h', self._buffer)[0] + struct.unpack('<h', rhs._buffer)[0]
+        )
 
     def isub(self, rhs):
         """Subtract another Integer in-place."""
-        # we can't apply the neg on the lhs and avoid a copy
-        # because of things like -32768 - (-1)
-        return self.iadd(rhs.clone().ineg())
+        rhs_int, = struct.unpack('<h', rhs._buffer)
+        # we negate the rhs first, so things like -1 - (-32768) overflow
+        if rhs_int == -0x8000:
+            raise error.BASICError(error.OVERFLOW)
+        return self.from_int(struct.unpack('<h', self._buffer)[0] - rhs_int)
 
     # no imul - we always promote to float first for multiplication
     # no idiv - we always promote to float first for true division
@@ -389,17 +379,7 @@ class Integer(Number):
         if isinstance(rhs, Float):
             # upgrade to Float
             return rhs.new().from_integer(self).gt(rhs)
-        isneg = bytearray(self._buffer)[-1] & 0x80
-        if isneg != (bytearray(rhs._buffer)[-1] & 0x80):
-            return not(isneg)
-        # compute the unsigned (not absolute!) >
-        lmsb = bytearray(self._buffer)[1] & 0x7f
-        rmsb = bytearray(rhs._buffer)[1] & 0x7f
-        if lmsb > rmsb:
-            return True
-        elif lmsb < rmsb:
-            return False
-        return bytearray(self._buffer)[0] > bytearray(rhs._buffer)[0]
+        return struct.unpack('<h', self._buffer)[0] > struct.unpack('<h', rhs._buffer)[0]
 
     def eq(self, rhs):
         """Equals."""
@@ -415,6 +395,8 @@ class Integer(Number):
 class Float(Number):
     """Abstract base class for floating-point value."""
 
+    __slots__ = ()
+
     digits = None
     pos_max = None
     neg_max = None
@@ -890,15 +872,17 @@ class Float(Number):
     _signmask = None
     _den_mask = None
     _den_upper = None
+    _den_bits = None
     _carrymask = None
+    _exp_shift = None
+    _sign_bit = None
 
     def _denormalise(self):
         """Denormalise to shifted mantissa, exp, sign."""
-        exp = bytearray(self._buffer)[-1]
-        man = struct.unpack(
-                self._intformat, b'\0' + bytearray(self._buffer)[:-1]
-            )[0] | self._den_mask
-        neg = self.is_negative()
+        value, = struct.unpack(self._intformat, self._buffer.tobytes())
+        exp = value >> self._exp_shift
+        man = ((value << 8) & (self._den_upper - 1)) | self._den_mask
+        neg = value & self._sign_bit != 0
         return exp, man, neg
 
     def _normalise(self, exp, man, neg):
@@ -908,9 +892,11 @@ class Float(Number):
             self._buffer[:] = b'\0' * self.size
             return self
         # shift left if subnormal
-        while man < (self._den_mask-1):
-            exp -= 1
-            man <<= 1
+        # a single shift takes us to the full width, except from just below the threshold
+        if man < self._den_mask - 1:
+            shift = self._den_bits - man.bit_length()
+            exp -= shift
+            man <<= shift
         # round to nearest; halves to even (Gaussian rounding)
         round_up = (man & 0xff > 0x80) or (man & 0xff == 0x80 and man & 0x100 == 0x100)
         man = (man & self._carrymask) + 0x100 * round_up
@@ -954,9 +940,18 @@ class Float(Number):
 
     def _bring_to_range(self, man, exp, lower, upper):
         """Bring mantissa to range (posmask, mask]."""
+        # shift to within one bit of the range in one go, then step
+        shift = lower.bit_length() - abs(man).bit_length()
+        if shift > 0:
+            exp -= shift
+            man <<= shift
         while abs(man) <= lower:
             exp -= 1
             man <<= 1
+        shift = abs(man).bit_length() - upper.bit_length()
+        if shift > 0:
+            exp += shift
+            man >>= shift
         while abs(man) > upper:
             exp += 1
             man >>= 1
@@ -967,17 +962,10 @@ class Float(Number):
         # don't compare zeroes - failsafe, is not reached in code
         if self.is_zero(): # pragma: no cover
             return False
-        rhscopy = bytearray(rhs._buffer)
-        # so long as the sign is the same ...
-        rhscopy[-2] &= (bytearray(self._buffer)[-2] | 0x7f)
-        # ... we can compare floats as if they were ints
-        for l, r in reversed(list(zip(bytearray(self._buffer), bytearray(rhscopy)))):
-            if l > r:
-                return True
-            elif l < r:
-                return False
-        # equal
-        return False
+        lhs, = struct.unpack(self._intformat, self._buffer.tobytes())
+        rhs, = struct.unpack(self._intformat, rhs._buffer.tobytes())
+        # so long as the sign is the same, we can compare floats as if they were ints
+        return lhs > rhs & ((lhs & self._sign_bit) | ~self._sign_bit)
 
     def _add_den(self, lden, rden):
         """Denormalised add."""
@@ -1039,6 +1027,31 @@ class Float(Number):
         """Denormalised divide."""
         lexp, lman, lneg = lden
         rexp, rman, rneg = rden
+        if not 0 < lman <= 2 * rman:
+            return self._div_den_long(lden, rden)
+        # signs
+        lneg = (lneg != rneg)
+        # subtract exponentials; one bit of the quotient for each bit of the divisor
+        nbits = rman.bit_length()
+        lexp -= rexp - self._bias - 8 + nbits - 1
+        # long division of mantissas, where the divisor is halved and truncated at each step
+        # as long as the divisor only loses zero bits it is exact and we can divide in one go
+        # a strict comparison amounts to dividing one less than the working mantissa
+        exact = (rman & -rman).bit_length()
+        lman, work_man = divmod(lman - 1, rman >> (exact - 1))
+        work_man += 1
+        for step in range(exact, nbits):
+            divisor = rman >> step
+            lman <<= 1
+            if work_man > divisor:
+                work_man -= divisor
+                lman += 1
+        return lexp, lman, lneg
+
+    def _div_den_long(self, lden, rden):
+        """Denormalised divide, one bit at a time."""
+        lexp, lman, lneg = lden
+        rexp, rman, rneg = rden
         # signs
         lneg = (lneg != rneg)
         # subtract exponentials
@@ -1063,6 +1076,8 @@ class Float(Number):
 class Single(Float):
     """Single-precision MBF float."""
 
+    __slots__ = ()
+
     sigil = b'!'
     size = 4
 
@@ -1079,7 +1094,10 @@ class Single(Float):
 
     _den_mask = 0x80000000
     _den_upper = _den_mask * 2
+    _den_bits = 32
     _carrymask = 0xffffff00
+    _exp_shift = 24
+    _sign_bit = 0x800000
 
     _signmask = 0x800000
     _mask = 0xffffff
@@ -1120,6 +1138,8 @@ class Single(Float):
 class Double(Float):
     """Double-precision MBF float."""
 
+    __slots__ = ()
+
     sigil = b'#'
     size = 8
 
@@ -1136,7 +1156,10 @@ class Double(Float):
 
     _den_mask = 0x8000000000000000
     _den_upper = _den_mask * 2
+    _den_bits = 64
     _carrymask = 0xffffffffffffff00
+    _exp_shift = 56
+    _sign_bit = 0x80000000000000
 
     _signmask = 0x80000000000000
     _mask = 0xffffffffffffff
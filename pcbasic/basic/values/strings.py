@@ -6,9 +6,11 @@ String values
 This file is released under the GNU GPL version 3 or later.
 """
 
+import time
 import struct
 import logging
 from operator import itemgetter
+from bisect import bisect_left
 
 from ...compat import iteritems
 
@@ -19,6 +21,8 @@ from . import numbers
 class String(numbers.Value):
     """String pointer."""
 
+    __slots__ = ('_stringspace',)
+
     sigil = b'$'
     size = 3
 
@@ -159,7 +163,13 @@ class StringSpace(object):
         """Initialise empty string space."""
         self._memory = memory
         self._strings = {}
+        # negated addresses of stored strings in ascending order, for address lookup
+        self._index = []
         self._temp = None
+        # garbage collection counters: number of runs, seconds spent, strings moved
+        self.gc_runs = 0
+        self.gc_time = 0.
+        self.gc_moved = 0
         self.clear()
 
     def __repr__(self):
@@ -172,6 +182,7 @@ class StringSpace(object):
     def clear(self):
         """Empty string space."""
         self._strings.clear()
+        del self._index[:]
         # strings are placed at the top of string memory, just below the stack
         self.current = self._memory.stack_start()
 
@@ -179,6 +190,7 @@ class StringSpace(object):
         """Rebuild from stored copy."""
         self.clear()
         self._strings.update(stringspace._strings)
+        self._index.extend(stringspace._index)
         self.current = stringspace.current
 
     def copy_to(self, string_space, length, address):
@@ -235,6 +247,8 @@ class StringSpace(object):
             if length > 0:
                 # copy and convert to bytearray
                 self._strings[address] = bytearray(in_str)
+                # new strings are always stored below all existing ones
+                self._index.append(-address)
         return length, address
 
     def _delete_last(self):
@@ -244,6 +258,7 @@ class StringSpace(object):
             length = len(self._strings[last_address])
             self.current += length
             del self._strings[last_address]
+            self._index.pop()
         except KeyError: # pragma: no cover
             # maybe happens if we're called before an out-of-memory exception is handled
             # and the string wasn't allocated
@@ -252,6 +267,7 @@ class StringSpace(object):
     def collect_garbage(self, string_ptrs):
         """Re-store the strings referenced in string_ptrs, delete the rest."""
         # string_ptrs should be a list of memoryviews to the original pointers
+        start = time.time()
         # retrieve addresses and copy strings
         string_list = []
         # find last non-temporary string
@@ -272,24 +288,41 @@ class StringSpace(object):
                         last_permanent, last_perm_view = addr, view
         # sort by address, largest first (maintain order of storage)
         string_list.sort(key=itemgetter(1), reverse=True)
-        # clear the string buffer and re-store all referenced strings
-        self.clear()
-        for view, _, string in string_list:
+        # strings that are already packed at the top of string space stay where they are
+        self.current = self._memory.stack_start()
+        kept = 0
+        for view, addr, string in string_list:
+            if addr != self.current - len(string) + 1:
+                break
+            self.current -= len(string)
+            view[:] = struct.pack('<BH', len(string), addr)
+            kept += 1
+        # drop everything below the lowest hole and re-store the referenced strings from there
+        hole = bisect_left(self._index, -self.current)
+        for neg_address in self._index[hole:]:
+            del self._strings[-neg_address]
+        del self._index[hole:]
+        for view, _, string in string_list[kept:]:
             # re-allocate string space
             # update the original pointers supplied (these are memoryviews)
             view[:] = struct.pack('<BH', *self.store(string, check_free=False))
+        self.gc_moved += len(string_list) - kept
         # readdress  start of temporary strings
         if last_perm_view is None:
             self._temp = None
         elif self._temp is not None and self._temp != self._memory.stack_start():
             self._temp = -1 + struct.unpack_from('<H', last_perm_view.tobytes(), 1)[0]
+        self.gc_runs += 1
+        self.gc_time += time.time() - start
 
     def get_memory(self, address):
         """Retrieve data from data memory: string space """
-        # find the variable we're in
-        for try_address, value in iteritems(self._strings):
-            length = len(value)
-            if try_address <= address < try_address + length:
+        # find the string we're in: the one at the highest address not above the given one
+        index = bisect_left(self._index, -address)
+        if index < len(self._index):
+            try_address = -self._index[index]
+            value = self._strings[try_address]
+            if address < try_address + len(value):
                 return value[address - try_address]
         return -1
 
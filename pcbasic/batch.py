@@ -0,0 +1,195 @@
+"""
+PC-BASIC - batch.py
+Run many BASIC programs concurrently
+
+(c) 2013--2023 Rob Hagemans
+This file is released under the GNU GPL version 3 or later.
+"""
+
+import io
+import os
+import json
+import time
+import shutil
+import logging
+import multiprocessing
+from collections import deque
+
+from .basic import Session
+from .basic.base import error
+from .compat import iteritems
+
+
+# time between checks for finished jobs, in seconds
+POLL_INTERVAL = 0.01
+
+# job outcomes
+OK = u'ok'
+BASIC_ERROR = u'error'
+TIMEOUT = u'timeout'
+STATEMENT_LIMIT = u'statement limit'
+CRASHED = u'crashed'
+
+# names of captured outputs in a job's result directory
+STDOUT_NAME = u'stdout.txt'
+LPT1_NAME = u'lpt1.txt'
+DRIVE_NAME = u'drive'
+SUMMARY_NAME = u'summary.json'
+
+
+def find_programs(specs):
+    """Expand a list of program files and directories of programs into program files."""
+    programs = []
+    for spec in specs:
+        if os.path.isdir(spec):
+            programs.extend(sorted(
+                os.path.join(spec, _name) for _name in os.listdir(spec)
+                if _name.upper().endswith(u'.BAS') and os.path.isfile(os.path.join(spec, _name))
+            ))
+        elif os.path.isfile(spec):
+            programs.append(spec)
+        else:
+            logging.warning(u'Could not find program or directory `%s`', spec)
+    return programs
+
+
+class BatchRunner(object):
+    """Run programs in a pool of processes, each in its own working directory."""
+
+    def __init__(self, session_params, output_dir, jobs=0, timeout=0, max_statements=0):
+        """Set up the batch runner; zero means no limit for timeout and max_statements."""
+        self._session_params = dict(session_params, input_streams=None, output_streams=None)
+        self._output_dir = output_dir
+        self._jobs = jobs or multiprocessing.cpu_count()
+        self._timeout = timeout
+        self._max_statements = max_statements
+
+    def run(self, programs):
+        """Run the programs, write the JSON summary and return it."""
+        start = time.time()
+        if not os.path.isdir(self._output_dir):
+            os.makedirs(self._output_dir)
+        pending = deque(self._prepare(programs))
+        running = []
+        results = []
+        while pending or running:
+            while pending and len(running) < self._jobs:
+                running.append(self._start(pending.popleft()))
+            for job in list(running):
+                if self._check(job):
+                    running.remove(job)
+                    results.append(job[u'result'])
+            time.sleep(POLL_INTERVAL)
+        summary = {
+            u'jobs': self._jobs,
+            u'wall_time': time.time() - start,
+            u'outcomes': {},
+            u'programs': sorted(results, key=lambda _r: _r[u'index']),
+        }
+        for result in results:
+            outcome = result[u'outcome']
+            summary[u'outcomes'][outcome] = summary[u'outcomes'].get(outcome, 0) + 1
+        with io.open(os.path.join(self._output_dir, SUMMARY_NAME), 'w') as f:
+            f.write(json.dumps(summary, indent=1, sort_keys=True))
+        return summary
+
+    def _prepare(self, programs):
+        """Create a result directory for each program, with a working directory to be its drive."""
+        names = set()
+        for index, program in enumerate(programs):
+            name = os.path.basename(program)
+            base, count = name, 1
+            while name in names:
+                count += 1
+                name = u'%s-%d' % (base, count)
+            names.add(name)
+            job_dir = os.path.join(self._output_dir, name)
+            drive = os.path.join(job_dir, DRIVE_NAME)
+            if os.path.isdir(job_dir):
+                shutil.rmtree(job_dir)
+            os.makedirs(drive)
+            shutil.copy(program, drive)
+            yield {
+                u'index': index,
+                u'program': program,
+                u'name': name,
+                u'dir': job_dir,
+            }
+
+    def _start(self, job):
+        """Launch a job in a new process."""
+        receiver, sender = multiprocessing.Pipe(False)
+        job_dir = job[u'dir']
+        # replace the current drive and printer with the job's own
+        devices = {
+            _key: _value for _key, _value in iteritems(self._session_params.get('devices') or {})
+            if _key not in (b'Z', u'Z', b'LPT1', u'LPT1')
+        }
+        devices.update({
+            b'Z': os.path.join(job_dir, DRIVE_NAME),
+            b'LPT1': u'FILE:' + os.path.join(job_dir, LPT1_NAME),
+        })
+        session_params = dict(self._session_params, devices=devices, current_device=b'Z')
+        process = multiprocessing.Process(target=_run_job, args=(
+            session_params, os.path.basename(job[u'program']),
+            os.path.join(job_dir, STDOUT_NAME), self._max_statements, sender
+        ))
+        process.start()
+        # only the child sends
+        sender.close()
+        job.update(process=process, receiver=receiver, start=time.time())
+        return job
+
+    def _check(self, job):
+        """Check if a job has finished and collect its result; kill it if out of time."""
+        process = job[u'process']
+        elapsed = time.time() - job[u'start']
+        if process.is_alive():
+            if not self._timeout or elapsed < self._timeout:
+                return False
+            process.terminate()
+            process.join()
+            report = {u'outcome': TIMEOUT}
+        else:
+            process.join()
+            try:
+                report = job[u'receiver'].recv()
+            except EOFError:
+                report = {u'outcome': CRASHED, u'exitcode': process.exitcode}
+        job[u'receiver'].close()
+        job[u'result'] = dict(report, **{
+            u'index': job[u'index'],
+            u'program': job[u'program'],
+            u'output': job[u'dir'],
+            u'wall_time': elapsed,
+        })
+        logging.info(u'%s: %s', job[u'name'], job[u'result'][u'outcome'])
+        return True
+
+
+def _run_job(session_params, program_name, stdout_path, max_statements, connection):
+    """Run a program in a new session and send a report of the outcome."""
+    report = {u'outcome': OK}
+    start = time.time()
+    with io.open(stdout_path, 'wb') as stdout:
+        # no input: the session ends if the program asks for any
+        session_params = dict(session_params, input_streams=io.BytesIO(), output_streams=stdout)
+        with Session(**session_params) as session:
+            try:
+                if max_statements:
+                    session.set_statement_limit(max_statements)
+                session.execute(b'RUN "%s"' % (program_name.encode('ascii', 'replace'),))
+            except error.StatementLimit:
+                report[u'outcome'] = STATEMENT_LIMIT
+            except error.Exit:
+                pass
+            report[u'run_time'] = time.time() - start
+            report[u'statements'] = session.stats()[u'statements']
+            # errors trapped by ON ERROR don't count, only those that stopped the program
+            last_error = session.get_last_error()
+            if last_error and report[u'outcome'] == OK:
+                report.update({
+                    u'outcome': BASIC_ERROR, u'error': last_error[0], u'line': last_error[1]
+                })
+    connection.send(report)
+    connection.close()
@@ -37,7 +37,7 @@ except ImportError: # pragma: no cover
 
 
 from .base import PLATFORM, PY2, WIN32, MACOS, X64
-from .base import USER_CONFIG_HOME, USER_DATA_HOME, BASE_DIR, HOME_DIR
+from .base import USER_CONFIG_HOME, USER_DATA_HOME, USER_CACHE_HOME, BASE_DIR, HOME_DIR
 from .streams import StreamWrapper, fix_stdio, is_readable_text_stream, is_writable_text_stream
 
 from .console import console, read_all_available, IS_CONSOLE_APP
@@ -48,7 +48,7 @@ if PY2: # pragma: no cover
     from .python2 import add_str, iterchar
     from .python2 import xrange, zip, iteritems, itervalues, iterkeys, iterbytes
     from .python2 import getcwdu, getenvu, setenvu, iterenvu
-    from .python2 import configparser, queue, copyreg, which
+    from .python2 import configparser, queue, copyreg, which, replace
     from .python2 import SimpleNamespace, TemporaryDirectory
     from .python2 import BrokenPipeError, is_broken_pipe
     unichr, int2byte, text_type = unichr, chr, unicode
@@ -63,6 +63,7 @@ else:
     from shutil import which
     from types import SimpleNamespace
     from tempfile import TemporaryDirectory
+    from os import replace
     from .python3 import int2byte, add_str, iterchar, iterbytes
     from .python3 import xrange, zip, iteritems, itervalues, iterkeys
     from .python3 import getcwdu, getenvu, setenvu, iterenvu
@@ -220,3 +221,21 @@ def random_id(number_digits, prefix='', exclude=()):
         if name not in exclude:
             return name
     raise RuntimeError('no free id of length {} available'.format(number_digits))
+
+def write_file_atomic(path, data):
+    """
+    Write bytes to a file through a temporary file, so that readers see either the old or the
+    new file in full. On Python 2 under Windows, readers may briefly find no file at all.
+    """
+    directory = os.path.dirname(path)
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory)
+    temp_path = u'%s.%d' % (path, os.getpid())
+    try:
+        with io.open(temp_path, 'wb') as temp_file:
+            temp_file.write(data)
+        replace(temp_path, path)
+    except EnvironmentError:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
@@ -33,12 +33,15 @@ HOME_DIR = os.path.expanduser(u'~')
 if WIN32:
     USER_CONFIG_HOME = os.getenv(u'APPDATA', default=u'')
     USER_DATA_HOME = USER_CONFIG_HOME
+    USER_CACHE_HOME = os.getenv(u'LOCALAPPDATA', default=USER_CONFIG_HOME)
 elif MACOS:
     USER_CONFIG_HOME = os.path.join(HOME_DIR, u'Library', u'Application Support')
     USER_DATA_HOME = USER_CONFIG_HOME
+    USER_CACHE_HOME = os.path.join(HOME_DIR, u'Library', u'Caches')
 else:
     USER_CONFIG_HOME = os.environ.get(u'XDG_CONFIG_HOME') or os.path.join(HOME_DIR, u'.config')
     USER_DATA_HOME = os.environ.get(u'XDG_DATA_HOME') or os.path.join(HOME_DIR, u'.local', u'share')
+    USER_CACHE_HOME = os.environ.get(u'XDG_CACHE_HOME') or os.path.join(HOME_DIR, u'.cache')
 
 # package/executable directory
 if hasattr(sys, 'frozen'):
@@ -105,6 +105,12 @@ def iterkeys(d, **kw):
 
 # utilities
 
+def replace(src, dst):
+    """Rename a file, overwriting any existing file; unlike os.replace, not atomic on Windows."""
+    if sys.platform == 'win32' and os.path.exists(dst):
+        os.remove(dst)
+    os.rename(src, dst)
+
 # from Python3.3 shutil module source
 def which(cmd, mode=os.F_OK | os.X_OK, path=None):
     """Given a command, mode, and a PATH string, return the path which
@@ -15,11 +15,12 @@ import locale
 import shutil
 import codecs
 from collections import deque
+from datetime import datetime
 
 from .compat import iteritems, text_type, iterchar
 from .compat import configparser
 from .compat import WIN32, get_short_pathname, argv, getcwdu
-from .compat import USER_CONFIG_HOME, USER_DATA_HOME, PY2
+from .compat import USER_CONFIG_HOME, USER_DATA_HOME, USER_CACHE_HOME, PY2
 from .compat import split_quoted, split_pair
 from .compat import console, IS_CONSOLE_APP, stdio
 from .compat import TemporaryDirectory
@@ -36,6 +37,10 @@ BASENAME = u'pcbasic-{0}'.format(MAJOR_VERSION)
 # user configuration and state directories
 USER_CONFIG_DIR = os.path.join(USER_CONFIG_HOME, BASENAME)
 STATE_PATH = os.path.join(USER_DATA_HOME, BASENAME)
+# compiled data, invalidated by any version change
+CACHE_PATH = os.path.join(USER_CACHE_HOME, BASENAME, VERSION)
+FONT_CACHE_PATH = os.path.join(CACHE_PATH, u'fonts')
+CODEPAGE_CACHE_PATH = os.path.join(CACHE_PATH, u'codepages')
 
 # default config file name
 CONFIG_NAME = u'PCBASIC.INI'
@@ -52,6 +57,9 @@ PROGRAM_PATH = os.path.join(STATE_PATH, u'bundled_programs')
 # maximum memory size
 MAX_MEMORY_SIZE = 65534
 
+# default output directory for batch runs
+BATCH_OUTPUT_PATTERN = u'pcbasic-batch-%Y%m%d-%H%M%S'
+
 # format for log files
 LOGGING_FORMAT = u'[%(asctime)s.%(msecs)04d] %(levelname)s: %(message)s'
 LOGGING_FORMATTER = logging.Formatter(fmt=LOGGING_FORMAT, datefmt=u'%H:%M:%S')
@@ -328,6 +336,17 @@ ARGUMENTS = {
     # negative list length means 'optionally up to'
     u'max-memory': {u'type': u'int', u'list': -2, u'default': [MAX_MEMORY_SIZE, 4096], u'listcheck': _check_max_memory},
     u'allow-code-poke': {u'type': u'bool', u'default': False,},
+    u'code-cache': {u'type': u'bool', u'default': True,},
+    u'poll-interval': {u'type': u'int', u'default': 10,},
+    u'profile': {u'type': u'string', u'default': u'',},
+    u'startup-profile': {u'type': u'bool', u'default': False,},
+    u'serve': {u'type': u'string', u'default': u'',},
+    u'serve-max-jobs': {u'type': u'int', u'default': 4,},
+    u'batch': {u'type': u'string', u'list': u'*', u'default': [],},
+    u'batch-output': {u'type': u'string', u'default': u'',},
+    u'jobs': {u'type': u'int', u'default': 0,},
+    u'timeout': {u'type': u'int', u'default': 0,},
+    u'max-statements': {u'type': u'int', u'default': 0,},
     u'reserved-memory': {u'type': u'int', u'default': 3429,},
     u'caption': {u'type': u'string', u'default': NAME,},
     u'text-width': {u'type': u'int', u'choices':(u'40', u'80'), u'default': 80,},
@@ -543,7 +562,7 @@ class Settings(object):
         max_list[0] = max_list[0] or max_list[1]
         # codepage parameters
         codepage_params = self.get('codepage').split(u':')
-        codepage_dict = data.read_codepage(codepage_params[0])
+        codepage_dict = data.read_codepage(codepage_params[0], CODEPAGE_CACHE_PATH)
         nobox = len(codepage_params) > 1 and codepage_params[1] == u'nobox'
         # video parameters
         video_params = self.get('video').split(u':')
@@ -558,7 +577,7 @@ class Settings(object):
             # screen settings
             'text_width': self.get('text-width'),
             'video_memory': self.get('video-memory'),
-            'font': data.read_fonts(codepage_dict, self.get('font')),
+            'font': data.read_fonts(codepage_dict, self.get('font'), FONT_CACHE_PATH),
             # find program for PCjr TERM command
             'term': self.get('term'),
             'shell': self.get('shell'),
@@ -577,6 +596,9 @@ class Settings(object):
             'hide_protected': self.get('hide-protected'),
             'allow_code_poke': self.get('allow-code-poke'),
             'rebuild_offsets': not self.convert,
+            'code_cache': self.get('code-cache'),
+            # keyboard and event polling
+            'poll_interval': self.get('poll-interval'),
             # max available memory to BASIC (set by /m)
             'max_memory': min(max_list) or 65534,
             # maximum record length (-s)
@@ -842,6 +864,8 @@ class Settings(object):
             # this preserves unicode as \x (if latin-1) and \u escapes
             'keys': self.get('keys').encode('ascii', 'backslashreplace').decode('unicode-escape'),
             'debug': self.get('debug'),
+            'profile': self.get('profile'),
+            'startup_profile': self.get('startup-profile'),
             }
         launch_params.update(self.session_params)
         return launch_params
@@ -865,6 +889,30 @@ class Settings(object):
             'log_dir': STATE_PATH,
             }
 
+    @property
+    def serve_params(self):
+        """Dict of fork server parameters."""
+        return {
+            'socket_path': self.get('serve'),
+            'max_jobs': self.get('serve-max-jobs'),
+            'uargv': self._uargv,
+            'session_params': self.session_params,
+            }
+
+    @property
+    def batch_params(self):
+        """Dict of batch runner parameters."""
+        return {
+            'programs': self.get('batch'),
+            'output_dir': (
+                self.get('batch-output') or datetime.now().strftime(BATCH_OUTPUT_PATTERN)
+            ),
+            'jobs': self.get('jobs'),
+            'timeout': self.get('timeout'),
+            'max_statements': self.get('max-statements'),
+            'session_params': self.session_params,
+            }
+
     @property
     def conv_params(self):
         """Get parameters for file conversion."""
@@ -892,6 +940,16 @@ class Settings(object):
         """Converter operating mode."""
         return self.get('convert', get_default=False) is not None
 
+    @property
+    def batch(self):
+        """Batch operating mode."""
+        return bool(self.get('batch'))
+
+    @property
+    def serve(self):
+        """Fork server operating mode."""
+        return bool(self.get('serve'))
+
     @property
     def debug(self):
         """Debugging mode."""
@@ -6,10 +6,13 @@ Codepage definition files
 This file is released under the GNU GPL version 3 or later.
 """
 
+import os
+import io
+import json
 import logging
 import binascii
 
-from ...compat import resources, unichr
+from ...compat import resources, unichr, iteritems, write_file_atomic
 
 
 # list of available codepages
@@ -20,8 +23,22 @@ CODEPAGES = tuple(
 )
 
 
-def read_codepage(codepage_name):
-    """Read a codepage file and convert to codepage dict."""
+_CACHE_PATTERN = '{name}.json'
+
+
+def read_codepage(codepage_name, cache_dir=None):
+    """Read a codepage file and convert to codepage dict, using a compiled cache if given."""
+    if cache_dir:
+        codepage = _read_cache(cache_dir, codepage_name)
+        if codepage is None:
+            codepage = _read_ucp(codepage_name)
+            _write_cache(cache_dir, codepage_name, codepage)
+        return codepage
+    return _read_ucp(codepage_name)
+
+
+def _read_ucp(codepage_name):
+    """Parse a codepage file."""
     codepage_name += '.ucp'
     codepage = {}
     for line in resources.read_binary(__package__, codepage_name).splitlines():
@@ -44,3 +61,30 @@ def read_codepage(codepage_name):
         except (ValueError, TypeError):
             logging.warning('Could not parse line in codepage file: %s', repr(line))
     return codepage
+
+
+###################################################################################################
+# compiled codepage cache
+
+# the cache is a json list of pairs of codepage points, as latin-1 text, and their clusters
+
+def _read_cache(cache_dir, codepage_name):
+    """Read a compiled codepage from the cache; None if not available."""
+    path = os.path.join(cache_dir, _CACHE_PATTERN.format(name=codepage_name))
+    try:
+        with io.open(path, 'rb') as cache_file:
+            table = json.loads(cache_file.read().decode('utf-8'))
+        return {_cp_point.encode('latin-1'): _cluster for _cp_point, _cluster in table}
+    except (EnvironmentError, ValueError, TypeError):
+        return None
+
+def _write_cache(cache_dir, codepage_name, codepage):
+    """Write a compiled codepage to the cache."""
+    path = os.path.join(cache_dir, _CACHE_PATTERN.format(name=codepage_name))
+    table = json.dumps([
+        [_cp_point.decode('latin-1'), _cluster] for _cp_point, _cluster in iteritems(codepage)
+    ])
+    try:
+        write_file_atomic(path, table.encode('utf-8'))
+    except EnvironmentError as e:
+        logging.debug('Could not write codepage cache file %s: %s', path, e)
@@ -7,17 +7,22 @@ This file is released under the GNU GPL version 3 or later.
 """
 
 
+import os
+import io
 import sys
+import json
 import logging
+import hashlib
 import binascii
 import unicodedata
 
-from ...compat import resources, iteritems, itervalues, unichr, iterchar
+from ...compat import resources, iteritems, itervalues, unichr, iterchar, write_file_atomic
 
 
 _HEIGHTS = (8, 14, 16)
 _DEFAULT_NAME = 'default'
 _FONT_PATTERN = '{name}_{height:02d}.hex'
+_CACHE_PATTERN = '{key}_{height:02d}.fnt'
 
 # (deprecated) aliases for the default font. should not include 'default'
 _DEFAULT_ALIASES = ('freedos', 'univga', 'unifont')
@@ -31,8 +36,8 @@ FONTS = tuple(sorted(set(
 )))
 
 
-def read_fonts(codepage_dict, font_families):
-    """Load font typefaces."""
+def read_fonts(codepage_dict, font_families, cache_dir=None):
+    """Load font typefaces, using compiled fonts in cache_dir if given."""
     # default font is fallback
     font_families = (_DEFAULT_NAME,) + tuple(font_families)
     # load the graphics fonts, including the 8-pixel RAM font
@@ -40,21 +45,25 @@ def read_fonts(codepage_dict, font_families):
     unicode_needed = set(itervalues(codepage_dict))
     # break up any grapheme clusters and add components to set of needed glyphs
     unicode_needed |= set(c for cluster in unicode_needed if len(cluster) > 1 for c in cluster)
-    # load font resources
-    font_files = {
-        _height: [
+    key = _get_cache_key(font_families, unicode_needed) if cache_dir else None
+    uc_fonts = {}
+    for height in _HEIGHTS:
+        if key:
+            fontdict = _read_cache(cache_dir, key, height)
+            if fontdict is not None:
+                uc_fonts[height] = fontdict
+                continue
+        # load font resources
+        font_files = [
             _font for _font in
-            (_read_font_file(_name, _height) for _name in font_families)
+            (_read_font_file(_name, height) for _name in font_families)
             if _font is not None
         ]
-        for _height in _HEIGHTS
-    }
-    # convert
-    uc_fonts = {
-        _height: load_hex(_font_file, _height, unicode_needed)
-        for _height, _font_file in iteritems(font_files)
-        if _font_file
-    }
+        if font_files:
+            # convert
+            uc_fonts[height] = load_hex(font_files, height, unicode_needed)
+            if key:
+                _write_cache(cache_dir, key, height, uc_fonts[height])
     return uc_fonts
 
 
@@ -70,6 +79,49 @@ def _read_font_file(name, height):
             logging.debug('Failed to load %d-pixel font `%s`: %s', height, name, e)
 
 
+###################################################################################################
+# compiled font cache
+
+# the cache is a json index of glyph sequences and their lengths on the first line,
+# followed by the concatenated glyphs
+
+def _get_cache_key(font_families, unicode_needed):
+    """Get a file name key for a set of font families and glyphs."""
+    description = json.dumps([list(font_families), sorted(unicode_needed)])
+    return hashlib.sha1(description.encode('utf-8')).hexdigest()
+
+def _read_cache(cache_dir, key, height):
+    """Read a compiled font from the cache; None if not available."""
+    path = os.path.join(cache_dir, _CACHE_PATTERN.format(key=key, height=height))
+    try:
+        with io.open(path, 'rb') as cache_file:
+            index = json.loads(cache_file.readline().decode('utf-8'))
+            glyphs = cache_file.read()
+    except (EnvironmentError, ValueError):
+        return None
+    fontdict = {}
+    offset = 0
+    for sequence, length in index:
+        fontdict[sequence] = glyphs[offset:offset+length]
+        offset += length
+    if offset != len(glyphs):
+        logging.debug('Ignoring damaged font cache file %s', path)
+        return None
+    return fontdict
+
+def _write_cache(cache_dir, key, height, fontdict):
+    """Write a compiled font to the cache."""
+    path = os.path.join(cache_dir, _CACHE_PATTERN.format(key=key, height=height))
+    items = sorted(iteritems(fontdict))
+    index = json.dumps([[_sequence, len(_glyph)] for _sequence, _glyph in items])
+    try:
+        write_file_atomic(
+            path, index.encode('utf-8') + b'\n' + b''.join(_glyph for _, _glyph in items)
+        )
+    except EnvironmentError as e:
+        logging.debug('Could not write font cache file %s: %s', path, e)
+
+
 ###################################################################################################
 # hex font loader
 
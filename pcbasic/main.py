@@ -8,20 +8,23 @@ This file is released under the GNU GPL version 3 or later.
 import io
 import os
 import sys
+import time
 import locale
 import logging
 import traceback
 
+from . import START_TIME
 from . import config
 from . import info
 from .basic import Session
 from .debug import DebugSession
-from .guard import ExceptionGuard
 from .basic import NAME, VERSION, LONG_VERSION, COPYRIGHT
-from .interface import Interface, InitFailed
 from .compat import stdio, resources, nullcontext
 from .compat import script_entry_point_guard
 
+# time at which all modules needed for a session have been loaded
+LOADED_TIME = time.time()
+
 
 def main(*arguments):
     """Initialise, parse arguments and perform requested operations."""
@@ -37,6 +40,12 @@ def main(*arguments):
         elif settings.convert:
             # convert and exit
             _convert(settings)
+        elif settings.batch:
+            # run many programs concurrently
+            _run_batch(settings)
+        elif settings.serve:
+            # run jobs submitted to a socket
+            _serve(settings)
         elif settings.interface:
             # start an interpreter session with interface
             _run_session_with_interface(settings)
@@ -70,8 +79,39 @@ def _convert(settings):
             session.execute(b'SAVE "%s"%s' % (outfile, mode_suffix))
 
 
+def _run_batch(settings):
+    """Run a batch of programs in a process pool."""
+    from .batch import BatchRunner, find_programs
+    params = settings.batch_params
+    programs = find_programs(params.pop('programs'))
+    summary = BatchRunner(**params).run(programs)
+    logging.info(
+        'Ran %d programs in %.2fs: %s. Results written to %s', len(programs), summary['wall_time'],
+        ', '.join('%d %s' % (_n, _outcome) for _outcome, _n in sorted(summary['outcomes'].items())),
+        params['output_dir']
+    )
+
+
+def _serve(settings):
+    """Run a fork server for BASIC jobs."""
+    if not hasattr(os, 'fork'):
+        logging.error('The fork server is not available on this platform.')
+        return
+    from .server import Server
+    server = Server(**settings.serve_params)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    except EnvironmentError as e:
+        logging.error('Fork server failed: %s', e)
+
+
 def _run_session_with_interface(settings):
     """Start an interactive interpreter session."""
+    # only load the interface modules when we need them, to keep start-up fast otherwise
+    from .interface import Interface, InitFailed
+    from .guard import ExceptionGuard
     try:
         interface = Interface(**settings.iface_params)
     except InitFailed as e: # pragma: no cover
@@ -87,7 +127,7 @@ def _run_session_with_interface(settings):
 
 def _run_session(
         interface=None, exception_handler=nullcontext,
-        resume=False, debug=False, state_file=None,
+        resume=False, debug=False, state_file=None, profile=u'', startup_profile=False,
         prog=None, commands=(), keys=u'', greeting=True, **session_params
     ):
     """Start or resume session, handle exceptions, suspend on exit."""
@@ -106,9 +146,15 @@ def _run_session(
         session = Session(**session_params)
     with exception_handler(session) as handler:
         with session:
+            if startup_profile:
+                _log_startup_profile(session)
+            if profile:
+                session.start_profiler()
             try:
                 _operate_session(session, interface, prog, commands, keys, greeting)
             finally:
+                if profile:
+                    _write_profile(session.stop_profiler(), profile)
                 try:
                     session.suspend(state_file)
                 except Exception as e:
@@ -119,6 +165,29 @@ def _run_session(
         )
 
 
+def _log_startup_profile(session):
+    """Report time taken to load modules, read settings and set up each subsystem."""
+    subsystems = session.stats()[u'startup']
+    now = time.time()
+    logging.info(u'start-up profile:')
+    logging.info(u'%-20s %10.4f', u'modules', LOADED_TIME - START_TIME)
+    logging.info(
+        u'%-20s %10.4f', u'settings', now - LOADED_TIME - sum(subsystems.values())
+    )
+    for name, seconds in sorted(subsystems.items(), key=lambda _item: -_item[1]):
+        logging.info(u'%-20s %10.4f', name, seconds)
+    logging.info(u'%-20s %10.4f', u'total', now - START_TIME)
+
+def _write_profile(profiler, profile_file):
+    """Write execution profile to file and report to log."""
+    try:
+        with io.open(profile_file, 'w') as stream:
+            profiler.write_json(stream)
+    except EnvironmentError as e:
+        logging.error('Failed to write profile to %s: %s', profile_file, e)
+    for line in profiler.get_report():
+        logging.info(line)
+
 def _operate_session(session, interface, prog, commands, keys, greeting):
     """Run an interactive BASIC session."""
     session.attach(interface)
@@ -0,0 +1,290 @@
+"""
+PC-BASIC - server.py
+Fork server for running many short BASIC jobs
+
+(c) 2013--2023 Rob Hagemans
+This file is released under the GNU GPL version 3 or later.
+
+Protocol
+--------
+The client connects to the server's unix socket and sends a request as a single line of JSON:
+    {
+        "program": program file contents, base64-encoded (optional),
+        "stdin": input to the program, base64-encoded (optional),
+        "files": {file name: file contents, base64-encoded} (optional),
+        "options": [command-line options for this job] (optional)
+    }
+The server answers with a sequence of frames, each consisting of a one-byte frame type
+and a four-byte big-endian payload length, followed by the payload:
+    O   output of the program, as raw codepage bytes
+    X   exit status, as a four-byte big-endian signed integer; this is the last frame
+If the connection closes without an exit status frame, the job was killed.
+"""
+
+import io
+import os
+import sys
+import json
+import stat
+import time
+import shutil
+import base64
+import select
+import socket
+import struct
+import logging
+import tempfile
+import traceback
+
+from .basic import Session
+from .compat import text_type
+from . import config
+
+
+# frame types
+OUTPUT = b'O'
+EXIT = b'X'
+# frame type and payload length
+_HEADER = struct.Struct('>cI')
+_STATUS = struct.Struct('>i')
+
+# job exit statuses
+STATUS_OK = 0
+STATUS_CRASHED = 1
+STATUS_BAD_REQUEST = 2
+
+# time between checks for finished jobs, in seconds
+POLL_INTERVAL = 0.01
+
+
+class Server(object):
+    """Run each job submitted to a local socket in a fork of a pre-loaded interpreter."""
+
+    def __init__(self, socket_path, session_params, max_jobs=4, uargv=()):
+        """Load everything a session needs, so that forked jobs don't have to."""
+        self._socket_path = socket_path
+        self._max_jobs = max(1, max_jobs)
+        self._uargv = list(uargv)
+        # fonts and codepage have been loaded by the settings
+        self._session_params = dict(session_params, input_streams=None, output_streams=None)
+        # build a template session to load all modules the interpreter needs before forking
+        with Session(**self._session_params) as template:
+            template.start()
+        # running jobs, by process id
+        self._jobs = set()
+        self._listener = None
+        self._stopped = False
+
+    def serve_forever(self):
+        """Accept jobs until shut down."""
+        self._listen()
+        try:
+            while not self._stopped:
+                self._reap()
+                if len(self._jobs) >= self._max_jobs:
+                    # wait for a job to finish before accepting another
+                    time.sleep(POLL_INTERVAL)
+                    continue
+                ready, _, _ = select.select([self._listener], [], [], POLL_INTERVAL)
+                if ready:
+                    connection, _ = self._listener.accept()
+                    self._fork(connection)
+        finally:
+            self._close()
+
+    def shutdown(self):
+        """Stop accepting jobs; serve_forever returns once running jobs have finished."""
+        self._stopped = True
+
+    def _listen(self):
+        """Open the socket, accessible only to the current user."""
+        if os.path.exists(self._socket_path):
+            if not stat.S_ISSOCK(os.stat(self._socket_path).st_mode):
+                raise EnvironmentError('%s exists and is not a socket' % (self._socket_path,))
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self._socket_path)
+            except socket.error:
+                # stale socket left by a server that is no longer running
+                os.remove(self._socket_path)
+            else:
+                raise EnvironmentError('%s is in use by another server' % (self._socket_path,))
+            finally:
+                probe.close()
+        self._listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        old_umask = os.umask(0o177)
+        try:
+            self._listener.bind(self._socket_path)
+        finally:
+            os.umask(old_umask)
+        self._listener.listen(socket.SOMAXCONN)
+        logging.info('Serving on %s, running up to %d jobs at once', self._socket_path, self._max_jobs)
+
+    def _close(self):
+        """Close the socket and wait for running jobs."""
+        self._listener.close()
+        try:
+            os.remove(self._socket_path)
+        except EnvironmentError:
+            pass
+        for pid in self._jobs:
+            os.waitpid(pid, 0)
+        self._jobs = set()
+
+    def _reap(self):
+        """Clean up finished jobs."""
+        for pid in list(self._jobs):
+            finished, _ = os.waitpid(pid, os.WNOHANG)
+            if finished:
+                self._jobs.remove(pid)
+
+    def _fork(self, connection):
+        """Run a job in a child process."""
+        pid = os.fork()
+        if pid:
+            connection.close()
+            self._jobs.add(pid)
+            return
+        # child process
+        status = STATUS_CRASHED
+        try:
+            self._listener.close()
+            status = self._run_job(connection)
+        except BaseException:
+            logging.error(''.join(traceback.format_exception(*sys.exc_info())))
+        finally:
+            try:
+                _send_frame(connection, EXIT, _STATUS.pack(status))
+                connection.close()
+            finally:
+                # don't run the server's cleanup in the child
+                os._exit(status)
+
+    def _run_job(self, connection):
+        """Read a request and run the job; return exit status."""
+        try:
+            request = json.loads(connection.makefile('rb').readline().decode('utf-8'))
+            program = _decode(request.get('program'))
+            stdin = _decode(request.get('stdin'))
+            files = {
+                _check_file_name(_name): _decode(_contents)
+                for _name, _contents in request.get('files', {}).items()
+            }
+            options = [text_type(_opt) for _opt in request.get('options', ())]
+        except (ValueError, TypeError, AttributeError) as e:
+            logging.error('Bad request: %s', e)
+            return STATUS_BAD_REQUEST
+        temp_dir = tempfile.mkdtemp(prefix='pcbasic-job-')
+        try:
+            # each job gets its own scratch drive Z:
+            drive = os.path.join(temp_dir, u'Z')
+            os.mkdir(drive)
+            for name, contents in files.items():
+                with io.open(os.path.join(drive, name), 'wb') as f:
+                    f.write(contents)
+            if options:
+                settings = config.Settings(temp_dir, self._uargv + options)
+                session_params = settings.session_params
+                commands = settings.launch_params['commands']
+                keys = settings.launch_params['keys']
+            else:
+                session_params = self._session_params
+                commands, keys = [], u''
+            devices = dict(session_params['devices'])
+            devices[b'Z'] = drive
+            session_params = dict(
+                session_params, devices=devices, current_device=b'Z',
+                input_streams=io.BytesIO(stdin), output_streams=_FrameWriter(connection),
+            )
+            with Session(**session_params) as session:
+                if program:
+                    with session.bind_file(io.BytesIO(program)) as progfile:
+                        session.execute(b'LOAD "%s"' % (progfile,))
+                session.press_keys(keys)
+                for cmd in commands:
+                    session.execute(cmd)
+                if program:
+                    session.execute(b'RUN')
+                # carry on in direct mode until the input runs out
+                session.interact()
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+        return STATUS_OK
+
+
+class _FrameWriter(object):
+    """Binary output stream that sends output frames."""
+
+    def __init__(self, connection):
+        """Wrap the connection."""
+        self._connection = connection
+
+    def write(self, data):
+        """Send output to the client."""
+        if isinstance(data, text_type):
+            raise TypeError('Output must be bytes, not unicode')
+        if data:
+            _send_frame(self._connection, OUTPUT, bytes(data))
+
+    def flush(self):
+        """Output is sent immediately."""
+
+
+def _decode(data):
+    """Decode a base64 field of the request."""
+    if not data:
+        return b''
+    return base64.b64decode(data.encode('ascii'))
+
+def _check_file_name(name):
+    """Only allow file names in the scratch directory."""
+    if not name or name in (u'.', u'..') or os.path.basename(name) != name:
+        raise ValueError('Invalid file name %r' % (name,))
+    return name
+
+def _send_frame(connection, frame_type, payload):
+    """Send a frame to the client."""
+    connection.sendall(_HEADER.pack(frame_type, len(payload)) + payload)
+
+def _recv_exactly(connection, length):
+    """Receive a given number of bytes; fewer if the connection closes."""
+    chunks = []
+    while length:
+        chunk = connection.recv(length)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        length -= len(chunk)
+    return b''.join(chunks)
+
+
+def submit(socket_path, program=b'', stdin=b'', files=None, options=(), output=None):
+    """
+    Run a job on a fork server and return its exit status, or None if the job was killed.
+    Output is written to the binary stream `output` as it arrives.
+    """
+    request = {
+        'program': base64.b64encode(program).decode('ascii'),
+        'stdin': base64.b64encode(stdin).decode('ascii'),
+        'files': {
+            _name: base64.b64encode(_contents).decode('ascii')
+            for _name, _contents in (files or {}).items()
+        },
+        'options': list(options),
+    }
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        connection.connect(socket_path)
+        connection.sendall(json.dumps(request).encode('utf-8') + b'\n')
+        while True:
+            header = _recv_exactly(connection, _HEADER.size)
+            if len(header) < _HEADER.size:
+                return None
+            frame_type, length = _HEADER.unpack(header)
+            payload = _recv_exactly(connection, length)
+            if frame_type == EXIT:
+                return _STATUS.unpack(payload)[0]
+            if output is not None:
+                output.write(payload)
+    finally:
+        connection.close()
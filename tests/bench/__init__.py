@@ -0,0 +1,9 @@
+"""
+PC-BASIC tests.bench
+benchmarks of representative BASIC workloads
+
+(c) 2023 Rob Hagemans
+This file is released under the GNU GPL version 3 or later.
+"""
+
+from .benchbasic import run_benchmarks, run_child, list_benchmarks
@@ -0,0 +1,41 @@
+"""
+PC-BASIC tests.bench
+benchmarks of representative BASIC workloads
+
+(c) 2023 Rob Hagemans
+This file is released under the GNU GPL version 3 or later.
+"""
+
+import sys
+
+from .benchbasic import run_benchmarks, run_child, THRESHOLD, BASELINES
+
+
+def contained(arglist, elem):
+    try:
+        arglist.remove(elem)
+    except ValueError:
+        return False
+    return True
+
+def option_value(arglist, elem, default):
+    try:
+        index = arglist.index(elem)
+    except ValueError:
+        return default
+    value = arglist[index+1]
+    del arglist[index:index+2]
+    return value
+
+
+args = sys.argv[1:]
+child = option_value(args, '--child', None)
+if child:
+    run_child(child)
+else:
+    save = contained(args, '--save')
+    repeat = int(option_value(args, '--repeat', 3))
+    threshold = float(option_value(args, '--threshold', THRESHOLD))
+    baseline_file = option_value(args, '--baseline', BASELINES)
+    if not run_benchmarks(args, repeat, threshold, save, baseline_file):
+        sys.exit(1)
@@ -0,0 +1,208 @@
+"""
+PC-BASIC tests.bench
+benchmarks of representative BASIC workloads
+
+(c) 2023 Rob Hagemans
+This file is released under the GNU GPL version 3 or later.
+"""
+
+from __future__ import print_function
+
+import sys
+import os
+import json
+import time
+import shutil
+import tempfile
+import subprocess
+try:
+    import resource
+except ImportError:
+    # not available on Windows
+    resource = None
+
+
+# make pcbasic package accessible
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.abspath(os.path.join(HERE, '..', '..'))
+sys.path = [ROOT] + sys.path
+
+# benchmark programs
+PROGRAMS = os.path.join(HERE, 'programs')
+# stored baselines
+BASELINES = os.path.join(HERE, '..', '_settings', 'benchmarks.json')
+# default regression threshold, in percent
+THRESHOLD = 10
+# name of the start-up time benchmark
+STARTUP = 'startup'
+
+# ANSI colours for benchmark status
+OK_COLOUR = '00;32'
+REGRESSED_COLOUR = '01;31'
+
+
+def list_benchmarks():
+    """Get the names of all benchmarks."""
+    return [STARTUP] + sorted(
+        os.path.splitext(_name)[0]
+        for _name in os.listdir(PROGRAMS) if _name.upper().endswith('.BAS')
+    )
+
+
+def get_peak_memory():
+    """Peak memory use of this process, in kilobytes; None if not known."""
+    if resource:
+        # kilobytes on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return None
+
+
+def run_startup_child():
+    """Time loading PC-BASIC and starting a session up to its first statement."""
+    start = time.time()
+    import pcbasic
+    with pcbasic.Session(input_streams=None, output_streams=None) as session:
+        session.execute(b'A=1')
+        startup_time = time.time() - start
+        subsystems = session.stats()['startup']
+    json.dump({
+        'startup_time': startup_time,
+        'subsystems': subsystems,
+        'peak_memory': get_peak_memory(),
+        'error': 0,
+    }, sys.stdout)
+
+
+def run_child(name):
+    """Run a benchmark program in this process and write its measurements as JSON to stdout."""
+    if name == STARTUP:
+        return run_startup_child()
+    import pcbasic
+    program = os.path.join(PROGRAMS, name + '.BAS')
+    # work on a scratch drive so that file benchmarks don't leave traces
+    workdir = tempfile.mkdtemp()
+    try:
+        with pcbasic.Session(
+                input_streams=None, output_streams=None,
+                devices={b'C': workdir}, current_device=b'C'
+            ) as session:
+            with session.bind_file(program) as progfile:
+                session.execute(b'LOAD "%s"' % (progfile,))
+            impl = session._impl
+            statements = session.stats()['statements']
+            start = time.time()
+            session.execute(b'RUN')
+            wall_time = time.time() - start
+            statements = session.stats()['statements'] - statements
+            # don't count time spent waiting for input or for the sound queue to drain
+            busy_time = wall_time - impl.queues.wait_time
+            errors = impl.interpreter.error_num
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    peak_memory = get_peak_memory()
+    json.dump({
+        'statements': statements,
+        'wall_time': wall_time,
+        'busy_time': busy_time,
+        'statements_per_second': statements / max(busy_time, 1e-9),
+        'peak_memory': peak_memory,
+        'error': errors,
+    }, sys.stdout)
+
+
+def get_speed(result):
+    """Speed of a benchmark run; higher is better."""
+    if 'startup_time' in result:
+        return 1. / max(result['startup_time'], 1e-9)
+    return result['statements_per_second']
+
+
+def measure(name, repeat):
+    """Run a benchmark in separate processes and keep the fastest run."""
+    best = None
+    for _ in range(repeat):
+        output = subprocess.check_output(
+            [sys.executable, '-m', 'tests.bench', '--child', name], cwd=ROOT
+        )
+        result = json.loads(output.decode('ascii'))
+        if best is None or get_speed(result) > get_speed(best):
+            best = result
+    return best
+
+
+def load_baselines(path):
+    """Read stored baselines."""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except EnvironmentError:
+        return {}
+
+
+def save_baselines(path, results):
+    """Store results as new baselines, keeping those of benchmarks not run."""
+    baselines = load_baselines(path)
+    baselines.update(results)
+    with open(path, 'w') as f:
+        json.dump(baselines, f, indent=4, sort_keys=True)
+
+
+def find_regressions(result, baseline, threshold):
+    """List the ways in which a result is worse than its baseline by more than the threshold."""
+    regressions = []
+    if not baseline:
+        return regressions
+    if get_speed(result) < (1. - threshold / 100.) * get_speed(baseline):
+        regressions.append('speed')
+    if (
+            result['peak_memory'] and baseline.get('peak_memory')
+            and result['peak_memory'] > (1. + threshold / 100.) * baseline['peak_memory']
+        ):
+        regressions.append('memory')
+    return regressions
+
+
+def colourise(text, colour):
+    return '\033[%sm%s\033[0m' % (colour, text)
+
+
+def run_benchmarks(names, repeat=3, threshold=THRESHOLD, save=False, baseline_file=BASELINES):
+    """Run benchmarks, compare to baselines and report. Returns True if nothing regressed."""
+    names = names or list_benchmarks()
+    baselines = load_baselines(baseline_file)
+    results = {}
+    regressed = []
+    print('%-12s %12s %12s %10s %10s' % ('benchmark', 'statements', 'stmt/s', 'baseline', 'peak kB'))
+    for name in names:
+        result = measure(name, repeat)
+        results[name] = result
+        baseline = baselines.get(name, {})
+        regressions = find_regressions(result, baseline, threshold)
+        if regressions:
+            regressed.append(name)
+            status = colourise('regressed: ' + ', '.join(regressions), REGRESSED_COLOUR)
+        elif result['error']:
+            status = colourise('error %d' % (result['error'],), REGRESSED_COLOUR)
+        else:
+            status = colourise('ok', OK_COLOUR)
+        if name == STARTUP:
+            # report time to first statement rather than speed
+            print('%-12s %12s %11.3fs %9s %10s %s' % (
+                name, '-', result['startup_time'],
+                '%.3fs' % (baseline['startup_time'],) if baseline else '-',
+                result['peak_memory'] or '-', status,
+            ))
+            continue
+        print('%-12s %12d %12.0f %10s %10s %s' % (
+            name, result['statements'], result['statements_per_second'],
+            '%.0f' % (baseline['statements_per_second'],) if baseline else '-',
+            result['peak_memory'] or '-', status,
+        ))
+    if regressed:
+        print('%d benchmarks regressed by more than %d%%: %s' % (
+            len(regressed), threshold, ' '.join(regressed)
+        ))
+    if save:
+        save_baselines(baseline_file, results)
+        print('baselines saved to %s' % (baseline_file,))
+    return not regressed
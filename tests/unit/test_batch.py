@@ -0,0 +1,85 @@
+"""
+PC-BASIC tests.test_batch
+Tests for batch runner
+
+(c) 2023 Rob Hagemans
+This file is released under the GNU GPL version 3 or later.
+"""
+
+import io
+import os
+import json
+
+from pcbasic import batch
+from tests.unit.utils import TestCase, run_tests
+
+
+class BatchTest(TestCase):
+    """Batch runner tests."""
+
+    tag = u'batch'
+
+    def _write_program(self, name, code):
+        """Write a program to the input directory."""
+        if not os.path.isdir(self.output_path('programs')):
+            os.makedirs(self.output_path('programs'))
+        with io.open(self.output_path('programs', name), 'wb') as f:
+            f.write(code)
+        return self.output_path('programs', name)
+
+    def test_batch(self):
+        """Run programs and capture their outputs."""
+        self._write_program(
+            'OUTPUT.BAS',
+            b'10 PRINT "screen": LPRINT "printer"\r\n'
+            b'20 OPEN "FILE.TXT" FOR OUTPUT AS 1: PRINT#1, "file": CLOSE 1\r\n'
+        )
+        self._write_program('ERROR.BAS', b'10 A = 1\r\n20 ERROR 5\r\n')
+        self._write_program('LOOP.BAS', b'10 GOTO 10\r\n')
+        self._write_program(
+            'TRAPPED.BAS', b'10 ON ERROR GOTO 100\r\n20 X = 1/0\r\n100 PRINT "handled": END\r\n'
+        )
+        # not a program
+        self._write_program('README.TXT', b'')
+        programs = batch.find_programs([self.output_path('programs')])
+        assert [os.path.basename(_p) for _p in programs] == [
+            'ERROR.BAS', 'LOOP.BAS', 'OUTPUT.BAS', 'TRAPPED.BAS'
+        ]
+        runner = batch.BatchRunner({}, self.output_path('out'), jobs=2, max_statements=1000)
+        summary = runner.run(programs)
+        error, loop, output, trapped = summary[u'programs']
+        assert output[u'outcome'] == batch.OK
+        # errors handled by ON ERROR don't stop the program
+        assert trapped[u'outcome'] == batch.OK
+        assert u'error' not in trapped
+        assert error[u'outcome'] == batch.BASIC_ERROR
+        assert (error[u'error'], error[u'line']) == (5, 20)
+        assert loop[u'outcome'] == batch.STATEMENT_LIMIT
+        assert loop[u'statements'] == 1000
+        assert summary[u'outcomes'] == {batch.OK: 2, batch.BASIC_ERROR: 1, batch.STATEMENT_LIMIT: 1}
+        with io.open(self.output_path('out', 'summary.json')) as f:
+            assert json.load(f) == summary
+        with io.open(os.path.join(output[u'output'], batch.STDOUT_NAME), 'rb') as f:
+            assert f.read().startswith(b'screen\r\n')
+        with io.open(os.path.join(output[u'output'], batch.LPT1_NAME), 'rb') as f:
+            assert f.read() == b'printer\r\n'
+        with io.open(os.path.join(output[u'output'], batch.DRIVE_NAME, 'FILE.TXT'), 'rb') as f:
+            assert f.read().startswith(b'file\r\n')
+
+    def test_timeout(self):
+        """Stop programs that run too long."""
+        program = self._write_program('LOOP.BAS', b'10 GOTO 10\r\n')
+        runner = batch.BatchRunner({}, self.output_path('out'), jobs=1, timeout=1)
+        summary = runner.run([program])
+        assert summary[u'programs'][0][u'outcome'] == batch.TIMEOUT
+
+    def test_same_names(self):
+        """Programs with the same name get separate working directories."""
+        program = self._write_program('HELLO.BAS', b'10 PRINT "hello"\r\n')
+        runner = batch.BatchRunner({}, self.output_path('out'), jobs=2)
+        summary = runner.run([program, program])
+        assert len(set(_r[u'output'] for _r in summary[u'programs'])) == 2
+
+
+if __name__ == '__main__':
+    run_tests()
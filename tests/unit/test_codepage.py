@@ -8,6 +8,7 @@ Codepage functionality tests
 This file is released under the GNU GPL version 3 or later.
 """
 
+import os
 from io import open
 
 from pcbasic import Session
@@ -222,6 +223,27 @@ class StreamWrapperTest(TestCase):
         wrapper2 = pickle.loads(pstr)
         assert wrapper2.read() == b'bcde\x9c'
 
+    def test_read_cached(self):
+        """Test reading compiled codepages from the cache."""
+        cache_dir = self.output_path('cpcache')
+        for name in ('437', '936'):
+            cp = read_codepage(name)
+            assert read_codepage(name, cache_dir) == cp
+            # second time around, read from cache
+            assert read_codepage(name, cache_dir) == cp
+        assert sorted(os.listdir(cache_dir)) == ['437.json', '936.json']
+
+    def test_single_byte_tables(self):
+        """Test translation tables for single-byte codepages."""
+        cp = Codepage(read_codepage('850'))
+        conv = cp.get_converter(preserve=(b'\r',))
+        ucs = conv.to_unicode(b'\x01caf\x82\r\xb3')
+        assert ucs == u'\u263acaf\xe9\r\u2502', ucs
+        assert conv.to_unicode_list(b'\x82\r') == [u'\xe9', u'\r']
+        # round trip, through the general conversion for eascii and unknown code points
+        assert cp.unicode_to_bytes(ucs) == b'\x01caf\x82\r\xb3'
+        assert cp.unicode_to_bytes(u'\u263a\0\1\u4e00\xe9') == b'\x01\0\1\x82'
+
     def test_newline_read(self):
         """Exercise NewlineWrapper."""
         stream = BytesIO(b'1\r\n2\r3\n')
@@ -9,7 +9,7 @@ This file is released under the GNU GPL version 3 or later.
 import unittest
 import os
 
-from pcbasic import Session
+from pcbasic import Session, font, codepage
 from pcbasic.compat import int2byte
 from tests.unit.utils import TestCase, run_tests
 
@@ -49,6 +49,42 @@ class DisplayTest(TestCase):
                 model_chars = model.read()
             assert bytes(bytearray(_c for _r in self.get_text(s) for _c in _r)) == model_chars
 
+    def test_pixels_headless(self):
+        """Text drawn only when pixels are needed gives the same pixels as drawing at once."""
+        program = b'''
+            10 KEY OFF: SCREEN %d: CLS
+            20 LOCATE 1, 1: PRINT "AB";: P = POINT(3, 3): PSET (36, 4), 3: LOCATE 1, 3: PRINT "CD"
+            30 LOCATE 1, 1: PRINT "E";: LOCATE 1, 10: PRINT "F": Q = POINT(4, 4)
+            40 FOR I = 1 TO 30: PRINT I: NEXT: PCOPY 0, 1
+            RUN
+        '''
+        for mode in (0, 1):
+            results = []
+            for headless in (True, False):
+                with Session() as s:
+                    s.execute(b'cls')
+                    s._impl.queues.headless = headless
+                    s.execute(program % (mode,))
+                    results.append((
+                        s.get_pixels(), s.get_variable('p!'), s.get_variable('q!'),
+                        s._impl.display.pages[-1].pixels[:, :],
+                    ))
+            assert results[0] == results[1]
+
+    def test_font_cache(self):
+        """Compiled fonts in cache equal fonts loaded from hex files."""
+        cache_dir = self.output_path('fontcache')
+        codepage_dict = codepage('437')
+        fonts = font(codepage_dict, [u'vga'])
+        cached = font(codepage_dict, [u'vga'], cache_dir)
+        assert len(os.listdir(cache_dir)) == 3
+        # second time around, the fonts are read from the cache
+        from_cache = font(codepage_dict, [u'vga'], cache_dir)
+        assert fonts == cached == from_cache
+        # a different font selection does not use the same cache
+        font(codepage_dict, [u'cga'], cache_dir)
+        assert len(os.listdir(cache_dir)) == 6
+
 
 if __name__ == '__main__':
     run_tests()
@@ -67,6 +67,28 @@ class DiskTest(unittest.TestCase):
         assert not os.path.isfile(self._output_path('TEST.LST'))
 
 
+    def test_load_merge_unsorted(self):
+        """Load and merge program files with unsorted, replaced and deleted lines."""
+        with open(self._output_path('UNSORTED.BAS'), 'wb') as f:
+            f.write(b'30 c=3\r\n10 a=1\r\n20 b=2\r\n10 a=4\r\n\x1a')
+        with open(self._output_path('MERGED.BAS'), 'wb') as f:
+            f.write(b'25 d=5\r\n20\r\n5 e=6\r\n25\r\n15 f=7\r\n40\r\n50 g=8\r\n\x1a')
+        with Session(devices={b'A': self._test_dir}, current_device='A:') as s:
+            s.execute('load "unsorted"')
+            program = s._impl.program
+            assert sorted(program.line_numbers) == [10, 20, 30, 65536]
+            s.execute('merge "merged"')
+            # line 40 does not exist: undefined line number, the lines before it are merged
+            assert sorted(program.line_numbers) == [5, 10, 15, 30, 65536]
+            assert program.last_stored == 15
+            listing = [_row.strip() for _row in s.execute('list', as_type=bytes).splitlines()]
+            assert listing[-4:] == [b'5 E=6', b'10 A=4', b'15 F=7', b'30 C=3'], listing
+            # next-line offsets are consistent with a program typed in line by line
+            code = program.bytecode.getvalue()
+            s.execute('new')
+            s.execute('30 C=3\r10 A=4\r5 E=6\r15 F=7')
+            assert program.bytecode.getvalue() == code
+
     def test_program_repr(self):
         """Test Program.__repr__."""
         with Session() as s:
@@ -90,6 +112,190 @@ class DiskTest(unittest.TestCase):
             s._impl.program.load(MockNonProgramFile())
         # we're not testing anything, just exercising the code path
 
+    def test_get_line_number(self):
+        """Test mapping code positions to line numbers after edits."""
+        with Session() as s:
+            s.execute("""
+                20 a=1
+                10 b=2
+                30 c=3
+            """)
+            program = s._impl.program
+            assert program.get_line_number(None) == -1
+            assert program.get_line_number(0) == 10
+            assert program.get_line_number(program.line_numbers[20]) == 20
+            assert program.get_line_number(program.line_numbers[20] - 1) == 10
+            assert program.get_line_number(program.line_numbers[30] + 1) == 30
+            s.execute('15 d=4')
+            assert program.get_line_number(program.line_numbers[20] - 1) == 15
+            s.execute('delete 15-20')
+            assert program.get_line_number(program.line_numbers[30] - 1) == 10
+            s.execute('renum 100')
+            assert program.get_line_number(program.line_numbers[110]) == 110
+            s.execute('10 error 5')
+            s.execute('run')
+            assert s.evaluate('erl') == 10
+
+    def test_store_line_deferred(self):
+        """Test typed lines are written to program memory when it is used."""
+        with Session(peek_values={}) as s:
+            s.execute('30 c=3\r10 a=1\r20 b=2\r40 d=4\r20\r5 e=5')
+            program = s._impl.program
+            # memory size is known before the lines are written
+            size = program.size()
+            assert program.has_line(10) and not program.has_line(20)
+            # the offset stored in line 10 points to line 30
+            address = program.code_start + len(b'\0\0\0\x05\0E\xe7\x16') + 1
+            assert s.evaluate('peek(%d) + 256 * peek(%d)' % (address, address + 1)) == (
+                program.code_start + 1 + program.line_numbers[30]
+            )
+            assert program.size() == size == len(program.bytecode.getvalue())
+            assert sorted(program.line_numbers) == [5, 10, 30, 40, 65536]
+            s.execute('20 b=2\r20\r50 f=6')
+            s.execute('run')
+            assert s.get_variable('a!') == 1
+            assert s.get_variable('b!') == 0
+            assert s.get_variable('f!') == 6
+            assert b'Undefined line number' in s.execute('60', as_type=bytes)
+
+    def test_code_cache(self):
+        """Test decoded statements are discarded when program code changes."""
+        for code_cache in (True, False):
+            with Session(peek_values={}, allow_code_poke=True, code_cache=code_cache) as s:
+                s.execute("""
+                    10 N=0
+                    20 X=1
+                    30 N=N+1: IF N<3 THEN POKE P, N+&H12: GOTO 20
+                """)
+                program = s._impl.program
+                # position of the token for the constant 1 in line 20
+                pos = program.bytecode.getvalue().index(b'X\xe7\x12') + 2
+                s.set_variable('P!', program.code_start + pos)
+                # GOTO rather than RUN so that P is kept
+                s.execute('goto 10')
+                assert s.evaluate('x') == 3
+                s.execute('20 X=4: N=N+1')
+                s.execute('30 N=N+1')
+                s.execute('tron: run 20')
+                assert s.evaluate('x') == 4
+                assert s.evaluate('n') == 2
+                assert b'[20][30]' in b''.join(b''.join(_row) for _row in s.get_chars())
+
+    def test_code_cache_expressions(self):
+        """Test compiled expressions give the same results as parsed ones."""
+        results = []
+        for code_cache in (True, False):
+            with Session(code_cache=code_cache) as s:
+                s.execute("""
+                    10 ON ERROR GOTO 100
+                    20 DIM B(10): A$="abc": DEF FNF(X)=X*2+1
+                    30 FOR I=0 TO 10: B(I)=I^2-(I MOD 3): A$=MID$(A$,2)+LEFT$(A$,1): NEXT
+                    40 C = B(2*2)+FNF(B(1)) AND NOT -1 OR INSTR(A$, "a")*&H10
+                    50 D# = 1/3# + VAL("1E3") + LEN(STRING$(3, A$)) + ASC(A$) / 0
+                    60 END
+                    100 E = ERR: RESUME NEXT
+                """)
+                s.execute('run')
+                results.append([s.get_variable(_name) for _name in ('a$', 'b!(10)', 'c!', 'd#', 'e!')])
+        assert results[0] == results[1], results
+
+    def test_code_cache_scalars(self):
+        """Test compiled variable references follow CLEAR and DEF statements."""
+        with Session(peek_values={}) as s:
+            s.execute("""
+                10 Y = X: X = 2: Z = X
+                20 DEFINT X: X = 3: W = X
+                30 V = X + 1: END
+            """)
+            s.execute('run')
+            assert s.get_variable('y!') == 0
+            assert s.get_variable('z!') == 2
+            assert s.get_variable('w!') == 3
+            assert s.get_variable('v!') == 4
+            s.execute('clear: x%=5: goto 30')
+            assert s.get_variable('v!') == 1
+            s.execute('x!=7: defsng x: goto 30')
+            assert s.get_variable('v!') == 8
+            # VARPTR-visible memory is unchanged
+            assert s.evaluate('peek(varptr(x!)+2)') == 96
+
+
+    def test_code_cache_loops(self):
+        """Test matching of loops gives the same results with and without cache."""
+        results = []
+        for code_cache in (True, False):
+            with Session(code_cache=code_cache) as s:
+                s.execute("""
+                    10 ON ERROR GOTO 100
+                    20 FOR K = 1 TO 2: N = 0: WHILE N < 3: N = N + 1
+                    30 FOR J = 1 TO N: S = S + J: NEXT J: WEND
+                    40 IF K = 2 THEN DEFINT J
+                    50 FOR J% = 1 TO 2: NEXT J
+                    60 NEXT K
+                    70 FOR I = 1 TO 2: WHILE 0
+                    80 END
+                    100 E = E + 1: PRINT ERR; ERL: RESUME NEXT
+                """)
+                s.execute('run')
+                output = [u''.join(_row).strip() for _row in s.get_chars(as_type=type(u''))]
+                results.append((s.get_variable('s!'), s.get_variable('e!'), output))
+                s.execute('70 FOR I = 1 TO 2: NEXT: WHILE 0: WEND')
+                s.execute('run')
+                results.append((s.get_variable('s!'), s.get_variable('e!')))
+        assert results[0] == results[2], results
+        assert results[1] == results[3], results
+        assert results[0][2][:4] == [u'1  50', u'1  50', u'26  70', u'29  70'], results
+
+    def test_code_cache_data(self):
+        """Test READ gives the same results with and without cache."""
+        results = []
+        for code_cache in (True, False):
+            with Session(code_cache=code_cache) as s:
+                s.execute("""
+                    10 ON ERROR GOTO 100
+                    20 FOR I = 1 TO 3: READ A, B$, C$: S$ = S$ + STR$(A) + B$ + C$ + ",": NEXT
+                    30 RESTORE 60: READ A%, B$: RESTORE: READ D, E$, F$, G: READ H%
+                    40 READ X: READ X
+                    50 END
+                    60 DATA 1, " two ", three :DATA &H10, unquoted"quoted", 3.5
+                    70 DATA 1E2, "", 4x, 5
+                    100 R$ = R$ + STR$(ERR) + STR$(ERL): RESUME NEXT
+                """)
+                s.execute('run')
+                results.append([
+                    s.get_variable(_name)
+                    for _name in ('s$', 'a%', 'b$', 'd!', 'e$', 'f$', 'g!', 'h%', 'x!', 'r$')
+                ])
+                s.execute('70 DATA 2E2')
+                s.execute('run')
+                results.append(s.get_variable('s$'))
+        assert results[0] == results[2], results
+        assert results[1] == results[3], results
+
+    def test_code_cache_functions(self):
+        """Test user functions keep parameters apart from variables with and without cache."""
+        results = []
+        for code_cache in (True, False):
+            with Session(code_cache=code_cache) as s:
+                s.execute("""
+                    10 X = 5: A$ = "x": DEF FNF(X, A$) = X * LEN(A$) + Y
+                    20 DEF FNG(X) = FNF(X + 1, "ab") + X
+                    30 Y = 1: P = FNF(2, "abc"): Q = FNG(3)
+                    40 DEFINT X: R = FNF(2.5, "a"): S = X + LEN(A$)
+                    50 END
+                """)
+                s.execute('run')
+                results.append([s.get_variable(_name) for _name in ('p!', 'q!', 'r!', 's!', 'x!')])
+                s.execute('clear: y = 2: print fnf(1, "")')
+                s.execute('10 DEF FNF(X, A$) = X * LEN(A$) + Y')
+                s.execute('run 10')
+                s.execute('y = 3: print fnf(2, "ab")')
+                results.append(b''.join(b''.join(_row) for _row in s.get_chars()).split())
+        assert results[0] == results[2], results
+        assert results[1] == results[3], results
+        assert results[0] == [7, 12, 4, 1, 5], results
+        assert results[1][:2] == [b'Undefined', b'user'], results
+        assert results[1][-1] == b'7', results
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,84 @@
+"""
+PC-BASIC tests.test_server
+Tests for fork server
+
+(c) 2023 Rob Hagemans
+This file is released under the GNU GPL version 3 or later.
+"""
+
+import io
+import os
+import threading
+import unittest
+
+from pcbasic import server
+from tests.unit.utils import TestCase, run_tests
+
+
+@unittest.skipIf(not hasattr(os, 'fork'), 'fork server not available on this platform')
+class ServerTest(TestCase):
+    """Fork server tests."""
+
+    tag = u'server'
+
+    def setUp(self):
+        """Start a server."""
+        TestCase.setUp(self)
+        self._socket = self.output_path('server.sock')
+        self._server = server.Server(self._socket, {'devices': {}}, max_jobs=2)
+        self._thread = threading.Thread(target=self._server.serve_forever)
+        self._thread.start()
+        while not os.path.exists(self._socket):
+            self._thread.join(0.01)
+
+    def tearDown(self):
+        """Stop the server."""
+        self._server.shutdown()
+        self._thread.join()
+
+    def test_job(self):
+        """Run a program with input and files."""
+        output = io.BytesIO()
+        status = server.submit(
+            self._socket,
+            program=b'10 INPUT A$: OPEN "IN.TXT" FOR INPUT AS 1: LINE INPUT#1, B$: PRINT A$; B$\r',
+            stdin=b'abc\r', files={u'IN.TXT': b'def\r\n'}, output=output
+        )
+        assert status == server.STATUS_OK
+        assert b'abcdef\r\n' in output.getvalue()
+
+    def test_options(self):
+        """Run a job with command-line options."""
+        output = io.BytesIO()
+        status = server.submit(self._socket, options=[u'-e', u'PRINT 1+1'], output=output)
+        assert status == server.STATUS_OK
+        assert output.getvalue().startswith(b' 2 \r\n')
+
+    def test_concurrent(self):
+        """Run more jobs than allowed at once."""
+        results = {}
+        def run(num):
+            output = io.BytesIO()
+            status = server.submit(self._socket, program=b'10 PRINT %d\r' % (num,), output=output)
+            results[num] = status, output.getvalue()
+        threads = [threading.Thread(target=run, args=(_num,)) for _num in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for num in range(5):
+            assert results[num] == (server.STATUS_OK, b' %d \r\nOk\xff\r\n' % (num,))
+
+    def test_bad_request(self):
+        """Files must stay on the scratch drive."""
+        status = server.submit(self._socket, files={u'../escape.txt': b''})
+        assert status == server.STATUS_BAD_REQUEST
+        assert not os.path.exists(self.output_path('escape.txt'))
+
+    def test_socket_permissions(self):
+        """The socket is only accessible to the current user."""
+        assert os.stat(self._socket).st_mode & 0o777 == 0o600
+
+
+if __name__ == '__main__':
+    run_tests()
@@ -10,10 +10,12 @@ This file is released under the GNU GPL version 3 or later.
 
 import os
 import io
+import array
 from io import open
 import unittest
 
 from pcbasic import Session
+from pcbasic.basic.base import error
 from tests.unit.utils import TestCase, run_tests
 
 
@@ -392,6 +394,233 @@ class SessionTest(TestCase):
                 [0.0, 0.0, 0.0], [0.0, 0.0, 0.0], [0.0, 0.0, 0.0]
             ]
 
+    def test_session_array_buffer(self):
+        """Test bulk copying of arrays to and from buffers."""
+        with Session() as session:
+            session.set_array_buffer('A%()', array.array('h', [1, -2, 3]))
+            assert session.get_variable('A%()') == [1, -2, 3]
+            assert session.get_array_buffer('a%') == b'\x01\x00\xfe\xff\x03\x00'
+            session.execute('DIM B#(1, 1): B#(1, 0) = 1.5: C!(1) = 2')
+            session.set_array_buffer('D#()', session.get_array_buffer('B#()'))
+            assert session.get_variable('D#()') == [0., 1.5, 0., 0.]
+            assert session.get_array_buffer('C!()')[4:8] == session.evaluate('mks$(2)')
+            assert session.get_array_buffer('E!()') == b''
+            with self.assertRaises(ValueError):
+                session.set_array_buffer('B#()', b'\0' * 8)
+            with self.assertRaises(ValueError):
+                session.set_array_buffer('F$()', b'\0' * 3)
+            with self.assertRaises(ValueError):
+                session.set_array_buffer('F%()', b'')
+
+    def test_array_indexing(self):
+        """Test element addressing in multidimensional arrays with OPTION BASE 1."""
+        with Session() as session:
+            session.execute("""
+            OPTION BASE 1: DIM K%(3, 2)
+            FOR I = 1 TO 3: FOR J = 1 TO 2: K%(I, J) = 10*I + J: NEXT: NEXT
+            """)
+            assert session.get_variable('K%()') == [[11, 12], [21, 22], [31, 32]]
+            assert session.evaluate('varptr(k%(2, 1)) - varptr(k%(1, 1))') == 2
+            assert session.evaluate('varptr(k%(1, 2)) - varptr(k%(1, 1))') == 6
+            session.execute('a = k%(0, 1)')
+            session.execute('b = k%(-1, 1)')
+            session.execute('c = k%(1, 1, 1)')
+            output = [u''.join(_row).strip() for _row in session.get_chars(as_type=type(u''))]
+            assert output[:3] == [
+                u'Subscript out of range', u'Illegal function call', u'Subscript out of range'
+            ]
+
+    def test_peek_variable_memory(self):
+        """Test PEEK into scalar, array and string space."""
+        with Session(peek_values={}) as session:
+            session.execute("""
+            A% = 258: B$ = "hello": C# = 1
+            DIM D%(3), E%(2), G%(1)
+            E%(1) = 772: G%(1) = 6
+            ERASE D%
+            F$ = B$ + "!"
+            """)
+            # scalar name record and value
+            assert session.evaluate('peek(varptr(a%)-4)') == 2
+            assert session.evaluate('peek(varptr(a%)-3)') == ord('A')
+            assert session.evaluate('peek(varptr(a%))') == 2
+            assert session.evaluate('peek(varptr(a%)+1)') == 1
+            # array name records and values
+            assert session.evaluate('peek(varptr(e%(0))-8)') == ord('E')
+            assert session.evaluate('peek(varptr(g%(0))-8)') == ord('G')
+            assert session.evaluate('peek(varptr(e%(1)))') == 4
+            assert session.evaluate('peek(varptr(e%(1))+1)') == 3
+            assert session.evaluate('peek(varptr(g%(1)))') == 6
+            # string space
+            assert session.evaluate(
+                'peek(peek(varptr(f$)+1) + 256*peek(varptr(f$)+2) + 5)'
+            ) == ord('!')
+            assert session.evaluate(
+                'peek(peek(varptr(b$)+1) + 256*peek(varptr(b$)+2))'
+            ) == ord('h')
+
+    def test_string_garbage_collection(self):
+        """Test string garbage collection keeps packed strings and compacts the rest."""
+        with Session(peek_values={}) as session:
+            session.execute("""
+            10 A$ = STRING$(10, "a"): B$ = STRING$(10, "b"): C$ = STRING$(10, "c")
+            20 B$ = "": P = 0: Q = 0: P = FRE(0): Q = FRE("")
+            """)
+            session.execute('run')
+            strings = session._impl.memory.strings
+            # the hole left by B$ is closed
+            assert session.get_variable('q!') - session.get_variable('p!') == 10
+            a_pointer = session.evaluate('peek(varptr(a$)+1) + 256*peek(varptr(a$)+2)')
+            c_pointer = session.evaluate('peek(varptr(c$)+1) + 256*peek(varptr(c$)+2)')
+            assert c_pointer == a_pointer - 10
+            assert session.get_variable('c$') == b'c' * 10
+            # A$ was already in place, only C$ needed moving
+            assert strings.gc_runs == 1
+            assert strings.gc_moved == 1
+
+    def test_event_polling(self):
+        """Test events are polled on a time budget unless event traps are on."""
+        with Session(poll_interval=10000) as session:
+            session.execute('10 FOR I = 1 TO 100: NEXT')
+            queues = session._impl.queues
+            session.execute('run')
+            assert queues.skipped_polls >= 100
+            polls = queues.polls
+            # with an event trap switched on, every statement is polled
+            session.execute('5 KEY(1) ON')
+            session.execute('run')
+            assert queues.polls - polls >= 100
+            assert queues.get_poll_rate() > 0
+        with Session(poll_interval=0) as session:
+            session.execute('for i = 1 to 100: next')
+            assert session._impl.queues.skipped_polls == 0
+
+    def test_profiler(self):
+        """Test execution profiler."""
+        with Session() as session:
+            assert session.stop_profiler() is None
+            session.execute('10 FOR I = 1 TO 10\n20 A = A + I: B = B + 1\n30 NEXT')
+            session.start_profiler()
+            session.execute('run')
+            # not counted outside a program
+            session.execute('a = 1')
+            profiler = session.stop_profiler()
+        profile = profiler.get_profile()
+        lines = {_line[u'line']: _line for _line in profile[u'lines']}
+        assert lines[10][u'hits'] == 1
+        assert lines[20][u'hits'] == 10
+        assert lines[20][u'statements'] == 20
+        assert lines[30][u'statements'] == 10
+        assert sorted(lines) == [10, 20, 30]
+        assert len(profile[u'statements']) == 4
+        assert set(profile[u'waits']) == {u'input', u'sound', u'string_gc'}
+        assert len(profiler.get_report()) == 3 + 5
+        with io.open(self.output_path('profile.json'), 'w') as f:
+            profiler.write_json(f)
+        with io.open(self.output_path('profile.json'), 'r') as f:
+            assert u'"statements"' in f.read()
+
+    def test_stats(self):
+        """Test runtime counters."""
+        with Session(devices={b'Z': self.output_path()}, current_device=b'Z') as session:
+            stats = session.stats()
+            session.execute('dim a(10): for i = 1 to 10: a(i) = i * 2: next')
+            session.execute('open "stats.txt" for output as 1: print #1, "hello": close 1')
+            session.execute('a$ = space$(100): b = fre("")')
+            after = session.stats()
+            info = session.info.repr_stats()
+        assert after[u'statements'] - stats[u'statements'] >= 20
+        assert after[u'expressions'] - stats[u'expressions'] >= 20
+        assert after[u'allocations'][u'scalars'] - stats[u'allocations'][u'scalars'] == 3
+        assert after[u'allocations'][u'arrays'] - stats[u'allocations'][u'arrays'] == 1
+        assert after[u'string_gc'][u'runs'] > stats[u'string_gc'][u'runs']
+        # 'hello' CR LF
+        assert after[u'devices'][u'Z:'] == {u'read': 0, u'written': 7}
+        assert u'devices.Z:.written: 7' in info
+
+    def test_stats_statements(self):
+        """Test counting executed statements."""
+        with Session(input_streams=None) as session:
+            session.execute(b'10 A = 1\n20 B = 2: C = 3')
+            start = session.stats()[u'statements']
+            # RUN itself is not counted, nor is the end of the program
+            session.execute(b'RUN')
+            assert session.stats()[u'statements'] - start == 3
+            start = session.stats()[u'statements']
+            session.execute(b'FOR I = 1 TO 3: NEXT')
+            assert session.stats()[u'statements'] - start == 4
+
+    def test_startup_times(self):
+        """Test recording of time taken to set up subsystems."""
+        with Session() as session:
+            startup = session.stats()[u'startup']
+        assert set((u'display', u'devices', u'interpreter')) <= set(startup)
+        assert all(_seconds >= 0 for _seconds in startup.values())
+
+    def test_last_error(self):
+        """Test getting the last error that stopped execution."""
+        with Session(input_streams=None) as session:
+            assert session.get_last_error() is None
+            session.execute(b'10 ON ERROR GOTO 100\n20 X = 1/0\n100 END')
+            session.execute(b'RUN')
+            # trapped errors don't count
+            assert session.get_last_error() is None
+            session.execute(b'NEW')
+            session.execute(b'10 A = 1\n30 ERROR 5')
+            session.execute(b'RUN')
+            assert session.get_last_error() == (5, 30)
+            session.execute(b'ERROR 13')
+            assert session.get_last_error() == (13, None)
+            # a clean run clears the error
+            session.execute(b'30 C = 3')
+            session.execute(b'RUN')
+            assert session.get_last_error() is None
+            session.execute(b'30 ERROR 5')
+            session.execute(b'RUN')
+            assert session.get_last_error() == (5, 30)
+            session.execute(b'PRINT')
+            assert session.get_last_error() is None
+
+    def test_statement_limit(self):
+        """Test stopping a program after a number of statements."""
+        with Session(input_streams=None) as session:
+            session.execute(b'10 I = I + 1: GOTO 10')
+            start = session.stats()[u'statements']
+            session.set_statement_limit(100)
+            with self.assertRaises(error.StatementLimit):
+                session.execute(b'RUN')
+            assert session.stats()[u'statements'] - start == 100
+            assert session.get_variable(b'I!') == 50
+            # the session is back in direct mode
+            assert not session._impl.interpreter.run_mode
+            assert not session._impl.interpreter.parse_mode
+            # direct-mode statements count too
+            session.set_statement_limit(3)
+            with self.assertRaises(error.StatementLimit):
+                session.execute(b'J = 1: J = 2: J = 3: J = 4')
+            assert session.get_variable(b'J!') == 3
+            # lift the limit
+            session.set_statement_limit()
+            session.execute(b'I = 0: FOR J = 1 TO 200: I = I + 1: NEXT')
+            assert session.get_variable(b'I!') == 200
+            assert not session._impl.interpreter.run_mode
+
+    def test_statement_limit_exact(self):
+        """Test a program runs to the end if it executes exactly as many statements as allowed."""
+        with Session(input_streams=None) as session:
+            session.execute(b'10 A = 1\n20 B = 2\n30 C = 3')
+            session.set_statement_limit(3)
+            session.execute(b'RUN')
+            assert session.get_variable(b'C!') == 3
+            session.start_profiler()
+            session.set_statement_limit(2)
+            with self.assertRaises(error.StatementLimit):
+                session.execute(b'RUN')
+            assert session.get_variable(b'C!') == 0
+            profiler = session.stop_profiler()
+        # the interrupted statement is no longer being timed
+        assert profiler._current is None
+
 
 from pcbasic.basic import iostreams
 from pcbasic.basic.codepage import Codepage
@@ -6,6 +6,8 @@ unit tests for values.values
 This file is released under the GNU GPL version 3 or later.
 """
 
+import struct
+
 from pcbasic import Session
 from pcbasic.basic.values import values
 from pcbasic.basic.values.numbers import Integer, Single, Double
@@ -292,6 +294,117 @@ class ValuesTest(TestCase):
         vm = values.Values(None, double_math=False)
         assert vm.new_single().from_value(0).to_str_fixed(3, False, False) == b'000'
 
+    def test_reference_arithmetic(self):
+        """Test fast float arithmetic gives the same bytes as the reference implementation."""
+        vm = values.Values(None, False)
+
+        def operands(single_cls, double_cls):
+            return [
+                _cls(None, vm).from_bytes(_bytes)
+                for _cls in (single_cls, double_cls)
+                for _bytes in (
+                    # ordinary, with trailing zero bits, near limits, extreme mantissas
+                    b'\x39\xa1\x3b\x82', b'\x00\x00\x20\x84', b'\x01\x00\x00\x81',
+                    b'\xff\xff\x7f\xff', b'\xff\xff\xff\x02', b'\x00\x00\x80\x01',
+                    b'\x13\x57\x9b\xdf\x02\x46\x8a\xce', b'\x00\x00\x00\x00\x00\x00\x40\x90',
+                    b'\xff\xff\xff\xff\xff\xff\x7f\xfe', b'\x01\x00\x00\x00\x00\x00\x80\x02',
+                )
+                if len(_bytes) == _cls.size
+            ]
+
+        def results(operands):
+            output = []
+            for left in operands:
+                for right in operands:
+                    if left.size != right.size:
+                        continue
+                    for oper in ('iadd', 'isub', 'imul', 'idiv'):
+                        try:
+                            output.append(getattr(left.clone(), oper)(right).to_bytes())
+                        except (OverflowError, ZeroDivisionError) as e:
+                            output.append(e.args[0].to_bytes())
+                    output.append((left.gt(right), left.eq(right)))
+                output.append(left.to_int())
+                output.append(left.new().from_value(left.to_value()).to_bytes())
+            return output
+
+        fast = results(operands(Single, Double))
+        reference = results(operands(ReferenceSingle, ReferenceDouble))
+        assert fast == reference
+
+
+class ReferenceArithmetic(object):
+    """Bit-by-bit float arithmetic helpers, to cross-check the fast implementation against."""
+
+    def _denormalise(self):
+        """Denormalise to shifted mantissa, exp, sign."""
+        exp = bytearray(self._buffer)[-1]
+        man = struct.unpack(
+                self._intformat, b'\0' + bytearray(self._buffer)[:-1]
+            )[0] | self._den_mask
+        neg = self.is_negative()
+        return exp, man, neg
+
+    def _normalise(self, exp, man, neg):
+        """Normalise from shifted mantissa, exp, sign."""
+        # zero denormalised mantissa -> make zero
+        if man == 0 or exp <= 0:
+            self._buffer[:] = b'\0' * self.size
+            return self
+        # shift left if subnormal
+        while man < (self._den_mask-1):
+            exp -= 1
+            man <<= 1
+        # round to nearest; halves to even (Gaussian rounding)
+        round_up = (man & 0xff > 0x80) or (man & 0xff == 0x80 and man & 0x100 == 0x100)
+        man = (man & self._carrymask) + 0x100 * round_up
+        if man >= self._den_upper:
+            exp += 1
+            man >>= 1
+        # pack into byte representation
+        struct.pack_into(
+            self._intformat, self._buffer, 0, (man>>8) & (self._mask if neg else self._posmask)
+        )
+        if self._check_limits(exp, neg):
+            self._buffer[-1:] = bytearray((exp,))
+        return self
+
+    def _bring_to_range(self, man, exp, lower, upper):
+        """Bring mantissa to range (posmask, mask]."""
+        while abs(man) <= lower:
+            exp -= 1
+            man <<= 1
+        while abs(man) > upper:
+            exp += 1
+            man >>= 1
+        return man, exp
+
+    def _abs_gt(self, rhs):
+        """Absolute values greater than."""
+        rhscopy = bytearray(rhs._buffer)
+        # so long as the sign is the same ...
+        rhscopy[-2] &= (bytearray(self._buffer)[-2] | 0x7f)
+        # ... we can compare floats as if they were ints
+        for l, r in reversed(list(zip(bytearray(self._buffer), bytearray(rhscopy)))):
+            if l > r:
+                return True
+            elif l < r:
+                return False
+        # equal
+        return False
+
+    def _div_den(self, lden, rden):
+        """Denormalised divide."""
+        return self._div_den_long(lden, rden)
+
+
+class ReferenceSingle(ReferenceArithmetic, Single):
+    """Single-precision float with reference arithmetic."""
+
+
+class ReferenceDouble(ReferenceArithmetic, Double):
+    """Double-precision float with reference arithmetic."""
+
 
 if __name__ == '__main__':
     run_tests()